@@ -1,32 +1,64 @@
+import argparse
+import multiprocessing
+import os
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
 import pandas as pd
 from fuzzywuzzy import fuzz
-from semantic_checker import semantic_similarity
+from columnar_store import file_signature, iter_chunks, read_table, save_table
+from flavor_sets import FlavorVocabulary
+import instrumentation
+from instrumentation import metrics
+from keyword_extractor import extract_keywords, extract_keywords_batch
+from model_registry import get_nlp, get_sentence_model
+from semantic_checker import semantic_similarity, semantic_similarity_matrix
 from pdf_processor import expand_flavor_keywords  # Import the expansion function
-import spacy
+from score_store import SCORE_STORE_PATH, ScoreStore, pair_key
+from score_sweep import save_components
+from streaming import TopKRows, append_chunk, load_checkpoint, save_checkpoint, truncate_file
 
-# Load spaCy model for keyword extraction
-nlp = spacy.load("en_core_web_sm")
+# Match scores above this are considered edible
+EDIBILITY_THRESHOLD = 0.75
 
+# Only the best scoring rows are written out
+OUTPUT_LIMIT = 10000
 
-def extract_keywords(sentence):
-    """
-    Extract key terms (adjectives, nouns) from a sentence using spaCy.
-    """
-    doc = nlp(sentence)
-    return [token.text.lower() for token in doc if token.pos_ in {"ADJ", "NOUN"}]
+# Rows per chunk in streaming mode
+DEFAULT_CHUNKSIZE = 50000
+
+# Rows per task when scoring with several worker processes
+DEFAULT_SHARD_SIZE = 5000
+
+# "exact" keeps every match_score as is; "decision" stops scoring a row once
+# its edibility is known, so an edible row's match_score is only a lower bound
+SCORING_MODES = ("exact", "decision")
+
+# Keyword/flavor pairs seen and decided by each scoring stage in this process
+prune_counters = Counter()
+
+# Columns a row's match score is computed from
+INPUT_COLUMNS = ['flavors', 'user_flavor']
+
+# Distinct input pairs seen and reused from the score store in this process
+store_counters = Counter()
 
 
+@metrics.timed()
 def compare_flavors(user_sentence, predicted_flavor, expanded_flavors):
     """
     Compare user's input sentence with the predicted flavor using combined methods.
     """
     user_keywords = extract_keywords(user_sentence)
-    best_score = 0.0
 
-    for user_keyword in user_keywords:
-        if user_keyword in expanded_flavors:
-            return 1.0  # Perfect match
+    # Any keyword among the expanded flavors is a perfect match, so look
+    # them all up before scoring anything
+    if any(user_keyword in expanded_flavors for user_keyword in user_keywords):
+        return 1.0
 
+    best_score = 0.0
+    for user_keyword in user_keywords:
         fuzzy_score = fuzz.ratio(user_keyword.lower(), predicted_flavor.lower()) / 100
         semantic_score = semantic_similarity(user_keyword, predicted_flavor)
 
@@ -39,15 +71,53 @@ def determine_edibility(match_score):
     """
     Determine if the dish is edible based on the match score.
     """
-    return "Edible" if match_score > 0.75 else "Potentially Spoiled"
+    return "Edible" if match_score > EDIBILITY_THRESHOLD else "Potentially Spoiled"
 
 
-def process_dataset(input_csv_path, output_csv_path):
+@metrics.timed()
+def score_row(user_sentence, flavors, expanded_flavors, mode="exact", counters=None):
     """
-    Process dataset to compute edibility and match score for each dish.
+    Best compare_flavors score of one row over its predicted flavors, in stages.
+
+    Keywords are first looked up among the expanded flavors, then fuzzy
+    scores are computed, and the embedding model only runs on the pairs that
+    can still change the result (see SCORING_MODES).
     """
-    data = pd.read_csv(input_csv_path)
+    counters = prune_counters if counters is None else counters
+    user_keywords = extract_keywords(user_sentence)
+    comparisons = len(user_keywords) * len(flavors)
+    counters["pairs"] += comparisons
+
+    # A synonym hit makes every flavor a perfect match
+    if any(user_keyword in expanded_flavors for user_keyword in user_keywords):
+        counters["synonym_pruned"] += comparisons
+        return 1.0
 
+    best_score = 0.0
+    for flavor in flavors:
+        for user_keyword in user_keywords:
+            best_score = max(best_score, fuzz.ratio(user_keyword.lower(), flavor.lower()) / 100)
+
+    if mode == "decision" and best_score > EDIBILITY_THRESHOLD:
+        counters["fuzzy_pruned"] += comparisons
+        return best_score
+
+    for position, flavor in enumerate(flavors):
+        for user_keyword in user_keywords:
+            best_score = max(best_score, semantic_similarity(user_keyword, flavor))
+        counters["semantic_scored"] += len(user_keywords)
+
+        if mode == "decision" and best_score > EDIBILITY_THRESHOLD:
+            counters["semantic_pruned"] += (len(flavors) - position - 1) * len(user_keywords)
+            break
+
+    return best_score
+
+
+def score_rows(data, mode="exact", counters=None):
+    """
+    Score each row one at a time with score_row.
+    """
     edibility_results = []
     match_scores = []
 
@@ -56,14 +126,12 @@ def process_dataset(input_csv_path, output_csv_path):
         user_flavor = row['user_flavor']
 
         # Expand the predicted flavors
-        expanded_flavors = expand_flavor_keywords(predicted_flavor.split(", "))
+        raw_flavors = predicted_flavor.split(", ")
+        expanded_flavors = expand_flavor_keywords(raw_flavors)
 
         # Calculate the match score
-        scores = [
-            compare_flavors(user_flavor, flavor.strip(), expanded_flavors)
-            for flavor in predicted_flavor.split(", ")
-        ]
-        match_score = max(scores)  # Best match score
+        flavors = [flavor.strip() for flavor in raw_flavors]
+        match_score = score_row(user_flavor, flavors, expanded_flavors, mode, counters)
 
         # Determine edibility
         edibility = determine_edibility(match_score)
@@ -71,20 +139,451 @@ def process_dataset(input_csv_path, output_csv_path):
         edibility_results.append(edibility)
         match_scores.append(match_score)
 
+    return edibility_results, match_scores
+
+
+@metrics.timed()
+def score_rows_bulk(data, batch_size=256, n_process=1, mode="exact", counters=None, components=None):
+    """
+    Columnar equivalent of score_rows.
+
+    Every distinct user text is parsed once, every distinct flavor list is
+    expanded once, and fuzzy/semantic scores are computed once over the keyword
+    and flavor vocabularies before being reduced back to rows. Pairs decided
+    by a synonym hit (or, in "decision" mode, by a fuzzy score) are left out
+    of the later stages, so only the texts still needed are encoded.
+
+    Flavor lists, their synonym expansions and the keywords of each text are
+    bitmasks over FlavorVocabulary IDs: a synonym hit is a non-empty
+    intersection, and the score matrices are indexed by flavor ID.
+
+    If `components` is a list, the chunk's fuzzy and semantic scores per
+    keyword/flavor comparison are appended to it (see score_sweep).
+    """
+    counters = prune_counters if counters is None else counters
+    if components is not None and mode != "exact":
+        raise ValueError("Component scores are only complete in exact mode")
+
+    # Rows sharing (flavors, user_flavor) always get the same score
+    pair_ids = data.groupby(['flavors', 'user_flavor'], sort=False, dropna=False).ngroup().to_numpy()
+    pairs = data[['flavors', 'user_flavor']].drop_duplicates().reset_index(drop=True)
+    pair_texts = pairs['user_flavor'].tolist()
+    pair_flavor_lists = pairs['flavors'].tolist()
+    metrics.observe("score_bulk.distinct_pairs", len(pairs))
+
+    # Parse all user texts in one pass
+    texts = pairs['user_flavor'].unique().tolist()
+    keywords_by_text = dict(zip(texts, extract_keywords_batch(texts, batch_size=batch_size, n_process=n_process)))
+
+    # Split and expand each distinct flavor list once, into flavor and synonym term masks
+    flavor_lists = pairs['flavors'].unique().tolist()
+    flavor_vocabulary = FlavorVocabulary()
+    term_vocabulary = FlavorVocabulary()
+    flavor_counts = {}
+    flavor_masks = {}
+    expanded_masks = {}
+    with metrics.timer("score_bulk.expand"):
+        for flavor_list in flavor_lists:
+            raw_flavors = flavor_list.split(", ")
+            flavor_counts[flavor_list] = len(raw_flavors)
+            flavor_masks[flavor_list] = flavor_vocabulary.mask(flavor.strip() for flavor in raw_flavors)
+            expanded_masks[flavor_list] = term_vocabulary.mask(expand_flavor_keywords(raw_flavors))
+    keyword_masks = {text: term_vocabulary.mask(keywords) for text, keywords in keywords_by_text.items()}
+
+    # Keyword/flavor comparisons per input row, for the pruning counters
+    row_counts = np.bincount(pair_ids, minlength=len(pairs))
+    comparisons = row_counts * np.array(
+        [len(keywords_by_text[text]) * flavor_counts[flavor_list]
+         for flavor_list, text in zip(pair_flavor_lists, pair_texts)],
+        dtype=np.int64,
+    ).reshape(len(pairs))
+    counters["pairs"] += int(comparisons.sum())
+
+    # Any keyword found among the expanded flavors is a perfect match
+    exact_hits = np.array([
+        (keyword_masks[text] & expanded_masks[flavor_list]) != 0
+        for flavor_list, text in zip(pair_flavor_lists, pair_texts)
+    ], dtype=bool).reshape(len(pairs))
+    pair_scores = np.zeros(len(pairs), dtype=np.float64)
+    pair_scores[exact_hits] = 1.0
+    counters["synonym_pruned"] += int(comparisons[exact_hits].sum())
+    undecided = np.flatnonzero(~exact_hits)
+
+    # Keywords and flavors of the undecided pairs, and their fuzzy score matrix (columns are flavor IDs)
+    keyword_vocab = list(dict.fromkeys(k for i in undecided for k in keywords_by_text[pair_texts[i]]))
+    keyword_ids = {keyword: i for i, keyword in enumerate(keyword_vocab)}
+    flavor_ids_by_list = {flavor_list: flavor_vocabulary.ids_in(mask) for flavor_list, mask in flavor_masks.items()}
+    undecided_flavors = 0
+    for i in undecided:
+        undecided_flavors |= flavor_masks[pair_flavor_lists[i]]
+    compared_flavors = flavor_vocabulary.ids_in(undecided_flavors)
+
+    with metrics.timer("score_bulk.fuzzy"):
+        fuzzy_scores = np.zeros((len(keyword_vocab), len(flavor_vocabulary)), dtype=np.float64)
+        fuzzy_scores[:, compared_flavors] = np.array(
+            [[fuzz.ratio(keyword, flavor_vocabulary.flavors[flavor_id].lower()) / 100
+              for flavor_id in compared_flavors] for keyword in keyword_vocab],
+            dtype=np.float64,
+        ).reshape(len(keyword_vocab), len(compared_flavors))
+
+    # One (pair, keyword) and (pair, flavor) record per occurrence
+    keyword_rows = pd.DataFrame(
+        [(pair_id, keyword_ids[keyword])
+         for pair_id in undecided
+         for keyword in keywords_by_text[pair_texts[pair_id]]],
+        columns=['pair_id', 'keyword_id'],
+    )
+    flavor_rows = pd.DataFrame(
+        [(pair_id, flavor_id)
+         for pair_id in undecided
+         for flavor_id in flavor_ids_by_list[pair_flavor_lists[pair_id]]],
+        columns=['pair_id', 'flavor_id'],
+    )
+    grid = keyword_rows.merge(flavor_rows, on='pair_id')
+    grid_pairs = grid['pair_id'].to_numpy(dtype=np.int64)
+    grid_keywords = grid['keyword_id'].to_numpy(dtype=np.int64)
+    grid_flavors = grid['flavor_id'].to_numpy(dtype=np.int64)
+    grid_scores = fuzzy_scores[grid_keywords, grid_flavors]
+
+    # In decision mode a fuzzy score above the threshold already makes the pair edible
+    decided = np.zeros(len(pairs), dtype=bool)
+    if mode == "decision":
+        fuzzy_best = np.zeros(len(pairs), dtype=np.float64)
+        np.maximum.at(fuzzy_best, grid_pairs, grid_scores)
+        decided = fuzzy_best > EDIBILITY_THRESHOLD
+        pair_scores[decided] = fuzzy_best[decided]
+        counters["fuzzy_pruned"] += int(comparisons[decided].sum())
+
+        remaining = ~decided[grid_pairs]
+        grid_pairs, grid_keywords, grid_flavors = grid_pairs[remaining], grid_keywords[remaining], grid_flavors[remaining]
+        grid_scores = grid_scores[remaining]
+
+    # Semantic scores, encoding only the keywords and flavors still compared
+    semantic_keywords = np.unique(grid_keywords)
+    semantic_flavors = np.unique(grid_flavors)
+    with metrics.timer("score_bulk.semantic"):
+        semantic_scores = np.asarray(
+            semantic_similarity_matrix(
+                [keyword_vocab[i] for i in semantic_keywords], [flavor_vocabulary.flavors[i] for i in semantic_flavors]
+            ),
+            dtype=np.float64,
+        ).reshape(len(semantic_keywords), len(semantic_flavors))
+    grid_semantic = semantic_scores[
+        np.searchsorted(semantic_keywords, grid_keywords), np.searchsorted(semantic_flavors, grid_flavors)
+    ]
+    if components is not None:
+        components.append({"row_pairs": pair_ids, "synonym_hits": exact_hits, "grid_pairs": grid_pairs,
+                           "fuzzy": grid_scores, "semantic": grid_semantic.astype(np.float32)})
+    grid_scores = np.maximum(grid_scores, grid_semantic)
+    scored = ~exact_hits & ~decided
+    counters["semantic_scored"] += int(comparisons[scored].sum())
+
+    # Best keyword/flavor score per pair, floored at 0 like compare_flavors
+    best = np.zeros(len(pairs), dtype=np.float64)
+    np.maximum.at(best, grid_pairs, grid_scores)
+    pair_scores[scored] = best[scored]
+
+    match_scores = pair_scores[pair_ids]
+    edibility_results = np.where(match_scores > EDIBILITY_THRESHOLD, "Edible", "Potentially Spoiled")
+    return edibility_results.tolist(), match_scores.tolist()
+
+
+def summarize_pruning(counters):
+    """
+    Print how many keyword/flavor pairs each scoring stage decided.
+    """
+    pairs = counters["pairs"] or 1
+    print(f"Keyword/flavor pairs: {counters['pairs']}")
+    for key, label in [("synonym_pruned", "Decided by synonym lookup"),
+                       ("fuzzy_pruned", "Decided by fuzzy score"),
+                       ("semantic_pruned", "Skipped after the decision"),
+                       ("semantic_scored", "Scored semantically")]:
+        print(f"{label}: {counters[key]} ({counters[key] / pairs:.1%})")
+
+
+def scoring_config(mode="exact"):
+    """
+    Everything besides a row's inputs that its match score depends on.
+    """
+    from embedding_table import EMBEDDING_TABLE_PATH
+    from model_registry import SENTENCE_BACKEND, SENTENCE_MODEL_NAME
+    from synonym_index import SYNONYM_INDEX_PATH
+
+    # Prebuilt tables change scores when rebuilt, so their signatures are part of it
+    table_path = os.path.join(EMBEDDING_TABLE_PATH, "terms.json")
+    return {
+        "edibility_threshold": EDIBILITY_THRESHOLD,
+        "mode": mode,
+        "sentence_model": SENTENCE_MODEL_NAME,
+        "sentence_backend": SENTENCE_BACKEND,
+        "embedding_table": file_signature(table_path) if os.path.exists(table_path) else None,
+        "synonym_index": file_signature(SYNONYM_INDEX_PATH) if os.path.exists(SYNONYM_INDEX_PATH) else None,
+    }
+
+
+def open_score_store(store_path, mode="exact"):
+    """
+    ScoreStore at `store_path` for the current scoring config, or None without a path.
+    """
+    return ScoreStore(store_path, scoring_config(mode)) if store_path else None
+
+
+def summarize_store(counters):
+    """
+    Print how many distinct input pairs were reused from the score store.
+    """
+    pairs = counters["pairs"] or 1
+    print(f"Distinct inputs: {counters['pairs']}, reused from the score store: {counters['stored']} "
+          f"({counters['stored'] / pairs:.1%}), scored: {counters['pairs'] - counters['stored']}")
+
+
+@metrics.timed()
+def process_dataset(input_csv_path, output_csv_path, bulk=True, chunksize=None, workers=1, mode="exact",
+                    store_path=None, full_rerun=False, components_path=None):
+    """
+    Process dataset to compute edibility and match score for each dish.
+
+    With `chunksize`, the input is streamed instead (see process_dataset_streaming).
+    With `workers` > 1, shards of the input are scored in a process pool
+    (whose own timings are not collected by instrumentation).
+    `mode` is one of SCORING_MODES. With `store_path`, only inputs missing
+    from that score store are scored (see score_chunks_incremental);
+    `full_rerun` scores everything again and refreshes the store.
+    With `components_path`, the fuzzy and semantic component scores are also
+    saved there for score_sweep.py.
+    """
+    if components_path and store_path:
+        raise ValueError("Component scores cannot be collected from an incremental run")
+    if chunksize:
+        return process_dataset_streaming(input_csv_path, output_csv_path, chunksize, bulk=bulk, workers=workers,
+                                         mode=mode, store_path=store_path, full_rerun=full_rerun,
+                                         components_path=components_path)
+
+    prune_counters.clear()
+    store_counters.clear()
+    store = open_score_store(store_path, mode)
+    components = [] if components_path else None
+    if workers > 1:
+        # Score shards in parallel; results come back in input order
+        shards = iter_chunks(input_csv_path, DEFAULT_SHARD_SIZE)
+        scored = score_chunks(shards, bulk=bulk, workers=workers, mode=mode, store=store, full_rerun=full_rerun,
+                              components=components)
+        data = pd.concat(scored, ignore_index=True)
+    elif store is not None:
+        data = read_table(input_csv_path)
+        data = next(score_chunks_incremental([data], store, bulk=bulk, mode=mode, full_rerun=full_rerun))
+    else:
+        data = read_table(input_csv_path)
+
+        # Score every row (bulk mode parses and encodes each distinct value once)
+        data = score_chunk(data, bulk=bulk, mode=mode, components=components)
+    if components_path:
+        save_components(components_path, components, scoring_config(mode))
+
+    # Remove duplicate rows
+    data = data.drop_duplicates()
+
+    # Ensure match_score is 1 for top 10,000 rows (stable, so ties keep input order like TopKRows)
+    data = data.sort_values(by='match_score', ascending=False, kind='stable').head(OUTPUT_LIMIT)
+
+    # Save updated dataset (as Parquet for a .parquet path)
+    save_table(data, output_csv_path)
+
+    summarize_results(data)
+    summarize_pruning(prune_counters)
+    if store is not None:
+        summarize_store(store_counters)
+        store.close()
+
+
+def score_chunk(data, bulk=True, mode="exact", counters=None, components=None):
+    """
+    Add edibility and match_score columns to a DataFrame.
+    """
+    if components is not None:
+        if not bulk:
+            raise ValueError("Component scores are only collected by the bulk scorer")
+        edibility_results, match_scores = score_rows_bulk(data, mode=mode, counters=counters, components=components)
+    else:
+        score = score_rows_bulk if bulk else score_rows
+        edibility_results, match_scores = score(data, mode=mode, counters=counters)
+
     # Add results to dataset
     data['edibility'] = edibility_results
     data['match_score'] = match_scores
+    return data
 
-    # Remove duplicate rows
-    data = data.drop_duplicates()
 
-    # Ensure match_score is 1 for top 10,000 rows
-    data = data.sort_values(by='match_score', ascending=False).head(10000)
+def score_chunk_counted(data, bulk=True, mode="exact", collect_components=False):
+    """
+    score_chunk for a worker process: also returns the chunk's pruning counters
+    and, if asked for, its component scores.
+    """
+    counters = Counter()
+    components = [] if collect_components else None
+    return score_chunk(data, bulk, mode, counters, components), counters, components
+
+
+def init_worker():
+    """
+    Load spaCy and the sentence transformer once per worker process.
+    """
+    get_nlp()
+    get_sentence_model()
+
+
+def score_chunks(chunks, bulk=True, workers=1, mode="exact", store=None, full_rerun=False, components=None):
+    """
+    Yield scored chunks in input order, using a pool of `workers` processes if > 1.
+
+    At most two chunks per worker are in flight, so the input is never read
+    far ahead of the results being consumed. Pruning counters of the workers
+    are added to this process's prune_counters. With a `store`, see
+    score_chunks_incremental. With a `components` list, each chunk's
+    component scores are appended to it in input order.
+    """
+    if store is not None:
+        if components is not None:
+            raise ValueError("Component scores cannot be collected from an incremental run")
+        yield from score_chunks_incremental(chunks, store, bulk, workers, mode, full_rerun)
+        return
+
+    if workers <= 1:
+        for chunk in chunks:
+            yield score_chunk(chunk, bulk=bulk, mode=mode, components=components)
+        return
+
+    def collect(future):
+        chunk, counters, chunk_components = future.result()
+        prune_counters.update(counters)
+        if components is not None:
+            components.extend(chunk_components)
+        return chunk
+
+    # Spawn rather than fork: torch and spaCy are not fork-safe once loaded
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(workers, mp_context=context, initializer=init_worker) as executor:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(score_chunk_counted, chunk, bulk, mode, components is not None))
+            if len(pending) >= 2 * workers:
+                yield collect(pending.popleft())
+        while pending:
+            yield collect(pending.popleft())
+
+
+def score_chunks_incremental(chunks, store, bulk=True, workers=1, mode="exact", full_rerun=False):
+    """
+    score_chunks that only scores the (flavors, user_flavor) inputs missing from `store`.
+
+    Each chunk is deduplicated on its inputs before scoring; new scores are
+    added to the store and merged with the stored ones into the chunk.
+    With `full_rerun` the store is not read, every input is scored again and
+    its stored score replaced.
+    """
+    pending = deque()
+
+    def missing_inputs():
+        for chunk in chunks:
+            pair_ids = chunk.groupby(INPUT_COLUMNS, sort=False, dropna=False).ngroup().to_numpy()
+            pairs = chunk[INPUT_COLUMNS].drop_duplicates().reset_index(drop=True)
+            keys = [pair_key(flavors, text) for flavors, text in zip(pairs['flavors'], pairs['user_flavor'])]
+            stored = {} if full_rerun else store.get_many(keys)
+
+            missing = np.array([key not in stored for key in keys], dtype=bool).reshape(len(keys))
+            store_counters["pairs"] += len(keys)
+            store_counters["stored"] += len(stored)
+            metrics.cache("score_store", hits=len(stored), misses=int(missing.sum()))
+
+            pending.append((chunk, pair_ids, keys, stored, missing))
+            yield pairs[missing].reset_index(drop=True)
+
+    for scored in score_chunks(missing_inputs(), bulk=bulk, workers=workers, mode=mode):
+        chunk, pair_ids, keys, stored, missing = pending.popleft()
+        new_keys = [key for key, is_missing in zip(keys, missing) if is_missing]
+        new_scores = scored['match_score'].tolist()
+        store.put_many(zip(new_keys, new_scores))
+        stored.update(zip(new_keys, new_scores))
+
+        match_scores = np.array([stored[key] for key in keys], dtype=np.float64)[pair_ids]
+        chunk['edibility'] = [determine_edibility(match_score) for match_score in match_scores]
+        chunk['match_score'] = match_scores.tolist()
+        yield chunk
+
+
+def iter_scored_chunks(input_csv_path, chunksize=DEFAULT_CHUNKSIZE, start_chunk=0, bulk=True, workers=1,
+                       mode="exact", store=None, full_rerun=False, components=None):
+    """
+    Yield (chunk_index, scored chunk) pairs, skipping the first `start_chunk` chunks.
+    """
+    reader = iter_chunks(input_csv_path, chunksize, start_chunk)
+
+    scored = score_chunks(reader, bulk=bulk, workers=workers, mode=mode, store=store, full_rerun=full_rerun,
+                          components=components)
+    yield from enumerate(scored, start=start_chunk)
+
+
+@metrics.timed()
+def process_dataset_streaming(input_csv_path, output_csv_path, chunksize=DEFAULT_CHUNKSIZE, bulk=True, workers=1,
+                              mode="exact", store_path=None, full_rerun=False, components_path=None):
+    """
+    Process the dataset chunk by chunk with bounded memory.
+
+    Scored chunks are appended to `<output>.partial` and the last completed
+    chunk is checkpointed in `<output>.checkpoint`, so rerunning after a crash
+    resumes from there. The top rows are then selected with a heap instead of
+    sorting the whole dataset. Collecting component scores (`components_path`)
+    needs every chunk, so it always starts from the first one.
+    """
+    partial_path = output_csv_path + ".partial"
+    checkpoint_path = output_csv_path + ".checkpoint"
+
+    # Resume from the last completed chunk, dropping any half-written one
+    checkpoint = None if components_path else load_checkpoint(checkpoint_path, input_csv_path, chunksize)
+    if checkpoint and os.path.exists(partial_path):
+        start_chunk = checkpoint["chunks_done"]
+        truncate_file(partial_path, checkpoint["output_bytes"])
+        print(f"Resuming from chunk {start_chunk}")
+    else:
+        start_chunk = 0
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+
+    prune_counters.clear()
+    store_counters.clear()
+    store = open_score_store(store_path, mode)
+    components = [] if components_path else None
+    scored_chunks = iter_scored_chunks(input_csv_path, chunksize, start_chunk, bulk=bulk, workers=workers, mode=mode,
+                                       store=store, full_rerun=full_rerun, components=components)
+    for chunk_index, chunk in scored_chunks:
+        with metrics.timer("io.append_chunk"):
+            output_bytes = append_chunk(partial_path, chunk, header=chunk_index == 0)
+            save_checkpoint(checkpoint_path, input_csv_path, chunksize, chunk_index + 1, output_bytes)
+    if components_path:
+        save_components(components_path, components, scoring_config(mode))
+
+    # Keep the best distinct rows without materializing the whole output
+    top_rows = TopKRows(OUTPUT_LIMIT, 'match_score')
+    for chunk in pd.read_csv(partial_path, chunksize=chunksize, float_precision='round_trip'):
+        top_rows.update(chunk)
+    data = top_rows.to_frame()
 
     # Save updated dataset
-    data.to_csv(output_csv_path, index=False)
+    save_table(data, output_csv_path)
+    os.remove(partial_path)
+    os.remove(checkpoint_path)
+
+    summarize_results(data)
+    summarize_pruning(prune_counters)
+    if store is not None:
+        summarize_store(store_counters)
+        store.close()
+
 
-    # Summarize results
+def summarize_results(data):
+    """
+    Print edibility counts and spoiled match score statistics.
+    """
     edible_count = data[data['edibility'] == "Edible"].shape[0]
     spoiled_count = data[data['edibility'] == "Potentially Spoiled"].shape[0]
     spoiled_mean = data[data['edibility'] == "Potentially Spoiled"]['match_score'].mean()
@@ -97,6 +596,26 @@ def process_dataset(input_csv_path, output_csv_path):
 
 
 if __name__ == "__main__":
-    input_csv = "/Users/rony/Downloads/PatternResourceFiles/Training_ToBeTested3.csv"
-    output_csv = "/Users/rony/Downloads/PatternResourceFiles/Training_ToBeTested3_Edibility.csv"
-    process_dataset(input_csv, output_csv)
+    parser = argparse.ArgumentParser(description="Add edibility and match scores to a taste dataset.")
+    parser.add_argument("input_csv", nargs="?",
+                        default="/Users/rony/Downloads/PatternResourceFiles/Training_ToBeTested3.csv")
+    parser.add_argument("output_csv", nargs="?",
+                        default="/Users/rony/Downloads/PatternResourceFiles/Training_ToBeTested3_Edibility.csv")
+    parser.add_argument("--workers", type=int, default=1, help="number of scoring processes")
+    parser.add_argument("--chunksize", type=int, default=None, help="stream the input in chunks of this many rows")
+    parser.add_argument("--loop", action="store_true", help="score row by row instead of in bulk")
+    parser.add_argument("--mode", choices=SCORING_MODES, default="exact",
+                        help="'decision' stops scoring a row once its edibility is known")
+    parser.add_argument("--incremental", action="store_true",
+                        help="only score inputs missing from the score store and reuse the stored scores")
+    parser.add_argument("--store", default=SCORE_STORE_PATH, help="score store used by --incremental")
+    parser.add_argument("--full-rerun", action="store_true",
+                        help="with --incremental, score every input again and refresh the store")
+    parser.add_argument("--components", help="also save the fuzzy/semantic component scores here for score_sweep.py")
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+
+    with instrumentation.run_from_arguments(args):
+        process_dataset(args.input_csv, args.output_csv, bulk=not args.loop, chunksize=args.chunksize,
+                        workers=args.workers, mode=args.mode, store_path=args.store if args.incremental else None,
+                        full_rerun=args.full_rerun, components_path=args.components)
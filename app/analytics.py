@@ -0,0 +1,444 @@
+import hashlib
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+matplotlib.use("Agg")  # Render to files only, never open windows
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import seaborn as sns
+
+from columnar_store import read_table, resolve_path, table_columns
+
+# Bump when the computed metrics change, to invalidate cached results
+ANALYTICS_VERSION = 1
+
+# Columns the analyses use, read with these dtypes when present
+COLUMN_DTYPES = {
+    'food_name': 'string',
+    'flavors': 'category',
+    'user_flavor': 'string',
+    'edibility': 'category',
+    'match_score': 'string',  # Parsed with to_numeric, bad values become 0
+    'ingredients': 'string',
+    'date': 'string',
+}
+
+# Cutoff used to turn match scores into edible / spoiled predictions
+ACCURACY_CUTOFF = 0.5
+
+EDIBILITY_MAPPING = {'edible': 1, 'potentially spoiled': 0}
+
+# Plots rendered by each report
+REPORT_PLOTS = {
+    'accuracy': ['confusion_matrix', 'match_score_distribution'],
+    'math': ['descriptive_statistics', 'correlation_heatmap', 'match_score_distribution_with_kde',
+             'boxplot_match_scores', 'trend_analysis', 'top_flavors'],
+    'visualizer': ['match_score_distribution', 'match_score_vs_ingredients', 'clustering_analysis',
+                   'flavors_frequencies'],
+    'normalize': ['normalized_match_score_distribution'],
+}
+
+
+def file_hash(path, block_size=1 << 20):
+    """
+    Content hash of a file, read in blocks.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def load_dataset(path):
+    """
+    Load only the analysed columns of the dataset, with explicit dtypes.
+    """
+    header = table_columns(path)
+    columns = [column for column in COLUMN_DTYPES if column in header]
+    return read_table(path, columns=columns, dtype={column: COLUMN_DTYPES[column] for column in columns})
+
+
+def compute_accuracy(edibility, scores):
+    """
+    Accuracy metrics of `match_score >= ACCURACY_CUTOFF` against the edibility labels.
+    """
+    from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
+
+    labels = edibility.astype('string').str.strip().str.lower().map(EDIBILITY_MAPPING)
+    if labels.isnull().any():
+        raise ValueError("Unexpected values in 'edibility' column. Please check the dataset.")
+
+    actual = labels.to_numpy(dtype=int)
+    predicted = (scores >= ACCURACY_CUTOFF).astype(int)
+    return {
+        'accuracy': accuracy_score(actual, predicted),
+        'confusion_matrix': confusion_matrix(actual, predicted),
+        'classification_report': classification_report(actual, predicted, target_names=['Spoiled', 'Edible']),
+    }
+
+
+def compute_clusters(scores):
+    """
+    KMeans (3 clusters) of the match scores.
+    """
+    from sklearn.cluster import KMeans
+
+    if len(scores) <= 1:
+        return None
+    try:
+        return KMeans(n_clusters=3, random_state=42).fit_predict(scores.reshape(-1, 1)).astype(np.int8)
+    except ValueError:
+        return None
+
+
+def compute_metrics(data):
+    """
+    Compute every metric used by the reports from one loaded dataset.
+    """
+    scores = pd.to_numeric(data['match_score'], errors='coerce').fillna(0).to_numpy(dtype=np.float64)
+    score_series = pd.Series(scores, name='match_score')
+    metrics = {
+        'rows': len(data),
+        'columns': list(data.columns),
+        'has_missing': bool(data.isnull().to_numpy().any()),
+        'scores': scores,
+        'describe': score_series.describe(),
+        'variance': score_series.var(),
+        'std': score_series.std(),
+        'min': scores.min() if len(scores) else 0.0,
+        'max': scores.max() if len(scores) else 0.0,
+        'flavor_counts': data['flavors'].value_counts().head(20) if 'flavors' in data else None,
+    }
+
+    try:
+        metrics['accuracy'] = compute_accuracy(data['edibility'], scores) if 'edibility' in data else None
+        metrics['accuracy_error'] = None if 'edibility' in data else "Missing required column: edibility"
+    except ValueError as error:
+        metrics['accuracy'], metrics['accuracy_error'] = None, str(error)
+
+    if 'ingredients' in data:
+        counts = data['ingredients'].fillna("Unknown").str.count(',').to_numpy(dtype=np.int32) + 1
+        metrics['ingredient_counts'] = counts
+        metrics['ingredient_correlation'] = pd.DataFrame(
+            {'match_score': scores, 'ingredient_count': counts}
+        ).corr()
+    else:
+        metrics['ingredient_counts'] = metrics['ingredient_correlation'] = None
+
+    if 'date' in data:
+        dates = pd.to_datetime(data['date'])
+        metrics['trend'] = score_series.groupby(dates.dt.date.to_numpy()).mean()
+    else:
+        metrics['trend'] = None
+
+    metrics['clusters'] = compute_clusters(scores)
+    return metrics
+
+
+def plot_confusion_matrix(metrics, path):
+    plt.figure(figsize=(8, 6))
+    sns.heatmap(metrics['accuracy']['confusion_matrix'], annot=True, fmt='d', cmap='Blues',
+                xticklabels=['Spoiled', 'Edible'], yticklabels=['Spoiled', 'Edible'])
+    plt.title('Confusion Matrix')
+    plt.xlabel('Predicted')
+    plt.ylabel('Actual')
+    plt.savefig(path)
+
+
+def plot_match_score_distribution(metrics, path):
+    plt.figure(figsize=(12, 8))
+    plt.hist(metrics['scores'], bins=20, color='skyblue', edgecolor='black')
+    plt.title('Distribution of Match Scores', fontsize=16)
+    plt.xlabel('Match Score', fontsize=14)
+    plt.ylabel('Frequency', fontsize=14)
+    plt.grid(True)
+    plt.savefig(path)
+
+
+def plot_descriptive_statistics(metrics, path):
+    desc_stats = metrics['describe']
+    plt.figure(figsize=(12, 6))
+    plt.bar(desc_stats.index, desc_stats.values, color='skyblue')
+    plt.title('Descriptive Statistics for Match Score', fontsize=16)
+    plt.ylabel('Value', fontsize=14)
+    plt.grid(axis='y')
+    plt.savefig(path)
+
+
+def plot_correlation_heatmap(metrics, path):
+    plt.figure(figsize=(10, 8))
+    sns.heatmap(metrics['ingredient_correlation'], annot=True, cmap='coolwarm', fmt='.2f')
+    plt.title('Correlation Heatmap', fontsize=16)
+    plt.savefig(path)
+
+
+def plot_match_score_distribution_with_kde(metrics, path):
+    plt.figure(figsize=(12, 6))
+    sns.histplot(metrics['scores'], bins=20, kde=True, color='purple')
+    plt.title('Match Score Distribution with KDE', fontsize=16)
+    plt.xlabel('Match Score', fontsize=14)
+    plt.ylabel('Frequency', fontsize=14)
+    plt.grid(True)
+    plt.savefig(path)
+
+
+def plot_boxplot_match_scores(metrics, path):
+    plt.figure(figsize=(12, 6))
+    sns.boxplot(x=metrics['scores'], color='orange')
+    plt.title('Boxplot for Match Scores', fontsize=16)
+    plt.xlabel('Match Score', fontsize=14)
+    plt.grid(True)
+    plt.savefig(path)
+
+
+def plot_trend_analysis(metrics, path):
+    plt.figure(figsize=(14, 6))
+    plt.plot(metrics['trend'], marker='o', linestyle='-', color='blue')
+    plt.title('Trend Analysis of Average Match Score Over Time', fontsize=16)
+    plt.xlabel('Date', fontsize=14)
+    plt.ylabel('Average Match Score', fontsize=14)
+    plt.grid(True)
+    plt.savefig(path)
+
+
+def plot_top_flavors(metrics, path):
+    plt.figure(figsize=(14, 8))
+    metrics['flavor_counts'].head(10).plot(kind='bar', color='green')
+    plt.title('Top 10 Flavors by Frequency', fontsize=16)
+    plt.xlabel('Flavors', fontsize=14)
+    plt.ylabel('Frequency', fontsize=14)
+    plt.xticks(rotation=45, fontsize=12)
+    plt.grid(axis='y')
+    plt.savefig(path)
+
+
+def plot_match_score_vs_ingredients(metrics, path):
+    plt.figure(figsize=(12, 8))
+    sns.scatterplot(x=metrics['ingredient_counts'], y=metrics['scores'], alpha=0.7, color='purple')
+    plt.title('Match Score vs. Number of Ingredients', fontsize=16)
+    plt.xlabel('Number of Ingredients', fontsize=14)
+    plt.ylabel('Match Score', fontsize=14)
+    plt.grid(True)
+    plt.savefig(path)
+
+
+def plot_clustering_analysis(metrics, path):
+    # Match score is the only feature, so clusters are shown along it
+    plt.figure(figsize=(12, 8))
+    sns.stripplot(x=metrics['scores'], y=metrics['clusters'], orient='h', hue=metrics['clusters'],
+                  palette='viridis', alpha=0.7)
+    plt.title('Clustering of Dishes by Match Score', fontsize=16)
+    plt.xlabel('Match Score', fontsize=14)
+    plt.ylabel('Cluster', fontsize=14)
+    plt.grid(True)
+    plt.savefig(path)
+
+
+def plot_flavors_frequencies(metrics, path):
+    plt.figure(figsize=(30, 30))
+    metrics['flavor_counts'].head(20).plot(kind='bar', color='teal')
+    plt.title('Top 20 Predicted Flavors by Frequency', fontsize=16)
+    plt.xlabel('Predicted Flavor', fontsize=14)
+    plt.ylabel('Frequency', fontsize=14)
+    plt.xticks(rotation=45, fontsize=12)
+    plt.grid(axis='y')
+    plt.savefig(path)
+
+
+def plot_normalized_match_score_distribution(metrics, path):
+    plt.figure(figsize=(10, 6))
+    plt.hist(normalize_scores(metrics['scores'], metrics), bins=20, color='skyblue', edgecolor='black')
+    plt.title('Distribution of Normalized Match Scores')
+    plt.xlabel('Normalized Match Score')
+    plt.ylabel('Frequency')
+    plt.grid(True)
+    plt.savefig(path)
+
+
+PLOTS = {
+    'confusion_matrix': (plot_confusion_matrix, ['accuracy'], ['scores']),
+    'match_score_distribution': (plot_match_score_distribution, [], ['scores']),
+    'descriptive_statistics': (plot_descriptive_statistics, [], ['describe']),
+    'correlation_heatmap': (plot_correlation_heatmap, ['ingredient_correlation'], ['ingredient_correlation']),
+    'match_score_distribution_with_kde': (plot_match_score_distribution_with_kde, [], ['scores']),
+    'boxplot_match_scores': (plot_boxplot_match_scores, [], ['scores']),
+    'trend_analysis': (plot_trend_analysis, ['trend'], ['trend']),
+    'top_flavors': (plot_top_flavors, ['flavor_counts'], ['flavor_counts']),
+    'match_score_vs_ingredients': (plot_match_score_vs_ingredients, ['ingredient_counts'],
+                                   ['scores', 'ingredient_counts']),
+    'clustering_analysis': (plot_clustering_analysis, ['clusters'], ['scores', 'clusters']),
+    'flavors_frequencies': (plot_flavors_frequencies, ['flavor_counts'], ['flavor_counts']),
+    'normalized_match_score_distribution': (plot_normalized_match_score_distribution, [],
+                                            ['scores', 'min', 'max']),
+}
+
+
+def render_plot(name, payload, path):
+    """
+    Render one plot to `path` (runs in a worker process).
+    """
+    PLOTS[name][0](payload, path)
+    plt.close('all')
+    return path
+
+
+def normalize_scores(scores, metrics):
+    """
+    Min-max scale match scores to [0, 1].
+    """
+    spread = metrics['max'] - metrics['min']
+    if not spread:
+        return np.zeros_like(scores)
+    return (scores - metrics['min']) / spread
+
+
+def cached_metrics(path, cache_dir):
+    """
+    Metrics for the file at `path`, reused from `cache_dir` while its content is unchanged.
+
+    The file hashed is the one load_dataset reads (see resolve_path), so a
+    stale CSV next to a fresher Parquet copy does not key the cache.
+    """
+    digest = file_hash(resolve_path(path))
+    cache_path = os.path.join(cache_dir, f"metrics_v{ANALYTICS_VERSION}_{digest}.pkl")
+
+    if os.path.exists(cache_path):
+        with open(cache_path, 'rb') as file:
+            return digest, pickle.load(file)
+
+    metrics = compute_metrics(load_dataset(path))
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = cache_path + ".tmp"
+    with open(tmp_path, 'wb') as file:
+        pickle.dump(metrics, file, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, cache_path)
+    return digest, metrics
+
+
+def render_plots(names, metrics, digest, output_dir, cache_dir, workers=None):
+    """
+    Render the named plots in parallel, skipping ones already rendered for this data.
+    """
+    manifest_path = os.path.join(cache_dir, "rendered_plots.pkl")
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, 'rb') as file:
+            manifest = pickle.load(file)
+
+    jobs = {}
+    for name in dict.fromkeys(names):
+        _, required, fields = PLOTS[name]
+        if any(metrics[field] is None for field in required):
+            continue
+        path = os.path.join(output_dir, f"{name}.png")
+        if manifest.get(os.path.abspath(path)) == digest and os.path.exists(path):
+            continue
+        payload = {field: metrics[field] for field in fields}
+        if name == 'confusion_matrix':
+            payload['accuracy'] = metrics['accuracy']
+        jobs[path] = (name, payload)
+
+    if jobs:
+        with ProcessPoolExecutor(workers) as executor:
+            futures = [executor.submit(render_plot, name, payload, path) for path, (name, payload) in jobs.items()]
+            for future in futures:
+                manifest[os.path.abspath(future.result())] = digest
+        with open(manifest_path, 'wb') as file:
+            pickle.dump(manifest, file)
+
+    return list(jobs)
+
+
+def write_normalized_dataset(path, output_path, metrics, chunksize=100000):
+    """
+    Write the full dataset with min-max scaled match scores, chunk by chunk.
+    """
+    header = True
+    for chunk in pd.read_csv(path, chunksize=chunksize):
+        chunk = chunk.fillna("Unknown")
+        scores = pd.to_numeric(chunk['match_score'], errors='coerce').fillna(0).to_numpy(dtype=np.float64)
+        chunk['match_score'] = normalize_scores(scores, metrics)
+        chunk.to_csv(output_path, mode='w' if header else 'a', header=header, index=False)
+        header = False
+
+
+def print_report(report, metrics):
+    """
+    Print the text output of one report.
+    """
+    if report == 'accuracy':
+        if metrics['accuracy'] is None:
+            raise ValueError(metrics['accuracy_error'])
+        print(f"Accuracy of the model: {metrics['accuracy']['accuracy']:.2f}")
+        print("Confusion Matrix:\n", metrics['accuracy']['confusion_matrix'])
+        print("Classification Report:\n", metrics['accuracy']['classification_report'])
+    elif report == 'math':
+        print("Descriptive Statistics for Match Score:\n", metrics['describe'])
+        if metrics['ingredient_correlation'] is None:
+            print("'ingredients' column not found. Skipping correlation analysis.")
+        print(f"Variance of Match Scores: {metrics['variance']}")
+        print(f"Standard Deviation of Match Scores: {metrics['std']}")
+        if metrics['trend'] is None:
+            print("'date' column not found. Skipping trend analysis.")
+    elif report == 'visualizer':
+        missing = [column for column in ['food_name', 'flavors', 'user_flavor', 'match_score', 'edibility']
+                   if column not in metrics['columns']]
+        if missing:
+            raise ValueError(f"Missing required column: {missing[0]}")
+        if metrics['ingredient_counts'] is None:
+            print("'ingredients' column not found. Skipping ingredient analysis.")
+        if metrics['clusters'] is None:
+            print("Not enough numeric values in 'match_score' for clustering.")
+
+
+def run_analysis(path, reports=tuple(REPORT_PLOTS), output_dir=".", cache_dir=None, workers=None,
+                 normalized_output_path=None):
+    """
+    Load the dataset once, compute every metric once and produce the requested reports.
+
+    Metrics and rendered plots are cached by the file's content hash (in
+    `<dataset dir>/.analytics_cache` by default), so rerunning on unchanged
+    data only prints the reports.
+    """
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(os.path.abspath(path)), ".analytics_cache")
+
+    try:
+        digest, metrics = cached_metrics(path, cache_dir)
+        print("Dataset loaded successfully.")
+    except FileNotFoundError:
+        print("File not found. Please check the file path.")
+        raise
+
+    for report in reports:
+        print_report(report, metrics)
+
+    plots = [name for report in reports for name in REPORT_PLOTS[report]]
+    render_plots(plots, metrics, digest, output_dir, cache_dir, workers)
+
+    if 'normalize' in reports and normalized_output_path:
+        write_normalized_dataset(path, normalized_output_path, metrics)
+        print(f"Normalized dataset saved to {normalized_output_path}.")
+
+    return metrics
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run all analyses of a scored taste dataset in one pass.")
+    parser.add_argument("dataset")
+    parser.add_argument("--reports", nargs="*", default=list(REPORT_PLOTS), choices=list(REPORT_PLOTS))
+    parser.add_argument("--output-dir", default=".")
+    parser.add_argument("--normalized-output", help="where the 'normalize' report writes the scaled dataset")
+    parser.add_argument("--workers", type=int, default=None, help="plot rendering processes")
+    args = parser.parse_args()
+
+    run_analysis(args.dataset, args.reports, args.output_dir, workers=args.workers,
+                 normalized_output_path=args.normalized_output)
+    print("All analyses completed. Check saved plots for results.")
@@ -1,63 +1,72 @@
-from fuzzywuzzy import fuzz
-from fuzzywuzzy import process
-from semantic_checker import semantic_similarity
+from addmatchscore import compare_flavors, determine_edibility  # Shared with the batch scorer
+from columnar_store import read_table
+from dish_index import DishIndex
+from instrumentation import metrics
 from pdf_processor import expand_flavor_keywords  # Import the expansion function
-import pandas as pd
-import spacy
+from result_cache import ResultCache, result_key
+from semantic_dish_index import load_semantic_index, merge_matches
 
 # Load the predicted flavors database
 FLAVOR_DATABASE_PATH = '/Users/nsenasabirli/Downloads/PatternProject 2/TrainingTaste_Edibility.csv'
 
-nlp = spacy.load("en_core_web_sm")
-
-def extract_keywords(sentence):
+def find_similar_dishes(dish_name, flavor_data, dish_index=None, semantic_index=None):
     """
-    Extract key terms (adjectives, nouns) from a sentence using spaCy.
+    Find similar dishes based on the dish name.
+    With a semantic index, dishes with a similar meaning are found too,
+    after the fuzzy name matches.
     """
-    doc = nlp(sentence)
-    keywords = [token.text.lower() for token in doc if token.pos_ in {"ADJ", "NOUN"}]
-    return keywords
-
-def compare_flavors(user_sentence, predicted_flavor, expanded_flavors):
+    if dish_index is None:
+        dish_index = DishIndex.from_frame(flavor_data)
+    matches = dish_index.search(dish_name, limit=5, score_cutoff=60)
+    if semantic_index is not None:
+        matches = merge_matches(matches, semantic_index.search(dish_name, limit=5), limit=5)
+    # Fuzzy matches (score > 60) first, then semantic ones (blended score > 50)
+    return [match[0] for match in matches]
+
+@metrics.timed()
+def score_description(user_input, predicted_flavors):
     """
-    Compare user's input sentence with the predicted flavor using combined methods.
+    Score a taste description against a dish's predicted flavors.
+    Returns the best matching flavor, its match score and the edibility.
     """
-    user_keywords = extract_keywords(user_sentence)
-    best_score = 0.0
-
-    for user_keyword in user_keywords:
-        if user_keyword in expanded_flavors:
-            return 1.0  # Perfect match
-
-        fuzzy_score = fuzz.ratio(user_keyword.lower(), predicted_flavor.lower()) / 100
-        semantic_score = semantic_similarity(user_keyword, predicted_flavor)
-        best_score = max(best_score, fuzzy_score, semantic_score)
+    # Expand the predicted flavors
+    flavors = predicted_flavors.split(", ")
+    expanded_flavors = expand_flavor_keywords(flavors)
 
-    return best_score
+    # Compare the user's input with each predicted flavor
+    scores = [
+        compare_flavors(user_input, flavor.strip(), expanded_flavors)
+        for flavor in flavors
+    ]
+    max_score = max(scores)  # Best match score
+    best_flavor = flavors[scores.index(max_score)]
 
-def determine_edibility(match_score):
-    """
-    Determine if the dish is edible based on the match score.
-    """
-    return "Edible" if match_score > 0.75 else "Potentially Spoiled"
+    # Determine edibility
+    return best_flavor, max_score, determine_edibility(max_score)
 
-def find_similar_dishes(dish_name, flavor_data):
+def score_dish(dish_name, user_input, predicted_flavors, result_cache=None):
     """
-    Find similar dishes based on the dish name.
+    score_description for a selected dish, through a ResultCache when given.
     """
-    dish_names = flavor_data['dish_name'].str.lower().tolist()
-    matches = process.extract(dish_name.lower(), dish_names, scorer=fuzz.ratio, limit=5)
-    return [match[0] for match in matches if match[1] > 60]  # Return matches with a score > 60
+    if result_cache is None:
+        return score_description(user_input, predicted_flavors)
+    return result_cache.get_or_compute(
+        result_key(dish_name, user_input), lambda: score_description(user_input, predicted_flavors)
+    )
 
 def main():
     # Load the flavor database
-    flavor_data = pd.read_csv(FLAVOR_DATABASE_PATH)
+    flavor_data = read_table(FLAVOR_DATABASE_PATH)
+    dish_index = DishIndex.for_csv(FLAVOR_DATABASE_PATH, flavor_data)
+    semantic_index = load_semantic_index(FLAVOR_DATABASE_PATH, flavor_data)
+    # Repeated queries are answered from RESULT_CACHE_PATH when it is set
+    result_cache = ResultCache.for_database(FLAVOR_DATABASE_PATH)
 
     # Prompt user for dish name
     dish_name = input("Enter the name of the dish: ").strip()
 
     # Search for similar dishes
-    similar_dishes = find_similar_dishes(dish_name, flavor_data)
+    similar_dishes = find_similar_dishes(dish_name, flavor_data, dish_index, semantic_index)
 
     if not similar_dishes:
         print(f"No dishes found similar to '{dish_name}'. Please try again.")
@@ -79,26 +88,14 @@ def main():
         selected_dish = similar_dishes[0]
 
     # Fetch dish data
-    filtered_data = flavor_data[flavor_data['dish_name'].str.lower() == selected_dish.lower()]
-    dish_data = filtered_data.iloc[0]
+    dish_data = flavor_data.iloc[dish_index.row_for(selected_dish)]
     predicted_flavors = dish_data["predicted_flavors"]
 
-    # Expand the predicted flavors
-    expanded_flavors = expand_flavor_keywords(predicted_flavors.split(", "))
-
     # Prompt the user for input
     user_input = input(f"What does the taste of {selected_dish} feel like? Describe it: ")
 
-    # Compare the user's input with the predicted flavor
-    scores = [
-        compare_flavors(user_input, flavor.strip(), expanded_flavors)
-        for flavor in predicted_flavors.split(", ")
-    ]
-    max_score = max(scores)  # Best match score
-    best_flavor = predicted_flavors.split(", ")[scores.index(max_score)]
-
-    # Determine edibility
-    edibility = determine_edibility(max_score)
+    # Compare the user's input with the predicted flavors
+    best_flavor, max_score, edibility = score_dish(selected_dish, user_input, predicted_flavors, result_cache)
 
     # Display results
     print(f"\nDish Name: {selected_dish}")
@@ -109,3 +106,8 @@ def main():
 
 if __name__ == "__main__":
     main()
+
+    # Run with PIPELINE_METRICS=1 for a timing report
+    if metrics.enabled:
+        print()
+        print(metrics.report())
@@ -0,0 +1,5 @@
+"""
+Performance benchmarks for the scoring pipeline.
+
+Run from the app directory, e.g. `python -m benchmarks.bench_workers`.
+"""
@@ -0,0 +1,107 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+
+from benchmarks.synthetic import FLAVORS, make_taste_dataset
+from model_registry import SENTENCE_MODEL_NAME
+from sentence_backends import BACKEND_MIN_COSINE, SENTENCE_BACKENDS, cosine_agreement
+
+# Loads one backend in a fresh interpreter, encodes the texts in `texts_path`
+# and saves the embeddings; reports load time, throughput and peak RSS (MiB)
+ENCODE_SNIPPET = """
+import json, time
+import numpy as np
+from sentence_backends import load_sentence_encoder
+
+def status(field):
+    with open("/proc/self/status") as file:
+        return next(int(line.split()[1]) for line in file if line.startswith(field + ":"))
+
+with open({texts_path!r}) as file:
+    texts = json.load(file)
+before = status("VmRSS")
+start = time.perf_counter()
+encoder = load_sentence_encoder({model_name!r}, {backend!r}, {threads!r})
+load_seconds = time.perf_counter() - start
+
+encoder.encode(texts[:{batch_size}], batch_size={batch_size})
+start = time.perf_counter()
+embeddings = encoder.encode(texts, batch_size={batch_size}, convert_to_numpy=True, show_progress_bar=False)
+seconds = time.perf_counter() - start
+np.save({output_path!r}, np.asarray(embeddings, dtype=np.float32))
+print(json.dumps({{
+    "load_seconds": load_seconds,
+    "texts_per_second": len(texts) / seconds,
+    "peak_rss_mb": (status("VmHWM") - before) / 1024,
+}}))
+"""
+
+
+def benchmark_texts(count):
+    """
+    Short keywords and longer descriptions, as the scorer encodes them.
+    """
+    descriptions = make_taste_dataset(count, repetition=0)['user_flavor'].tolist()
+    words = sorted({word for description in descriptions for word in description.split()})
+    return (FLAVORS + words + descriptions)[:count]
+
+
+def run_backend(backend, texts_path, output_path, threads, batch_size):
+    snippet = ENCODE_SNIPPET.format(
+        texts_path=texts_path, model_name=SENTENCE_MODEL_NAME, backend=backend, threads=threads,
+        batch_size=batch_size, output_path=output_path,
+    )
+    result = subprocess.run([sys.executable, "-c", snippet], capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare sentence model backends: throughput, memory, agreement.")
+    parser.add_argument("backends", nargs="*", default=list(SENTENCE_BACKENDS), choices=SENTENCE_BACKENDS)
+    parser.add_argument("--texts", type=int, default=5000)
+    parser.add_argument("--threads", type=int, default=None, help="intra-op threads (default: the runtime's)")
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    # The PyTorch embeddings are the reference for the cosine tolerance
+    backends = ["torch"] + [backend for backend in args.backends if backend != "torch"]
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        texts_path = os.path.join(tmp_dir, "texts.json")
+        with open(texts_path, "w") as file:
+            json.dump(benchmark_texts(args.texts), file)
+
+        for backend in backends:
+            output_path = os.path.join(tmp_dir, f"{backend}.npy")
+            results[backend] = run_backend(backend, texts_path, output_path, args.threads, args.batch_size)
+
+            agreement = cosine_agreement(np.load(os.path.join(tmp_dir, "torch.npy")), np.load(output_path))
+            results[backend]["min_cosine"] = float(agreement.min())
+            results[backend]["mean_cosine"] = float(agreement.mean())
+            results[backend]["within_tolerance"] = bool(agreement.min() >= BACKEND_MIN_COSINE[backend] - 1e-6)
+
+    print(f"{args.texts} texts, batch size {args.batch_size}, threads {args.threads or 'default'}")
+    print(f"{'backend':>10} {'load s':>7} {'texts/s':>9} {'peak MB':>8} {'min cos':>8} {'tolerance':>9}")
+    for backend, result in results.items():
+        print(f"{backend:>10} {result['load_seconds']:>7.2f} {result['texts_per_second']:>9.0f} "
+              f"{result['peak_rss_mb']:>8.0f} {result['min_cosine']:>8.5f} "
+              f"{'ok' if result['within_tolerance'] else 'EXCEEDED':>9}")
+
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump({"texts": args.texts, "threads": args.threads, "batch_size": args.batch_size,
+                       "results": results}, file, indent=2)
+
+    if not all(result["within_tolerance"] for result in results.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import argparse
+import json
+import time
+
+import numpy as np
+
+from benchmarks.stub_models import install_stub_models
+from benchmarks.synthetic import make_dish_names
+from dish_index import DishIndex
+from embedding_table import dequantize
+from semantic_dish_index import DEFAULT_NPROBE, SemanticDishIndex, name_embeddings
+
+
+def latencies(search, queries):
+    """
+    p50/p95/max milliseconds of one search per query.
+    """
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        search(query)
+        timings.append((time.perf_counter() - start) * 1000)
+    return {"p50_ms": float(np.percentile(timings, 50)), "p95_ms": float(np.percentile(timings, 95)),
+            "max_ms": max(timings)}
+
+
+def recall(index, queries, nprobe, k=10):
+    """
+    Share of the exact k nearest names (by cosine) that the probed lists contain.
+    """
+    vectors = dequantize(np.asarray(index.values), np.asarray(index.scales))
+    found = 0
+    for query in queries:
+        query_vector = name_embeddings.encode([query.lower()])[0]
+        exact = np.argpartition(-(vectors @ query_vector), k - 1)[:k]
+        found += np.isin(exact, index.candidates(query_vector, nprobe)).sum()
+    return found / (k * len(queries))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build time, latency and recall of the semantic dish index.")
+    parser.add_argument("--dishes", type=int, default=200000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--nprobe", type=int, nargs="*", default=[4, DEFAULT_NPROBE, 64])
+    parser.add_argument("--added", type=float, default=0.01, help="share of new dishes for the incremental update")
+    parser.add_argument("--stub-models", action="store_true", help="use the offline stub encoder")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    if args.stub_models:
+        install_stub_models()
+
+    names = make_dish_names(args.dishes + int(args.dishes * args.added))
+    base_names = names[:args.dishes]
+    rng = np.random.default_rng(0)
+    # Abbreviated names: the first few letters of each word
+    queries = [" ".join(word[:4] for word in names[i].split()) for i in rng.choice(args.dishes, args.queries)]
+
+    start = time.perf_counter()
+    index = SemanticDishIndex.build(base_names)
+    results = {"build_seconds": time.perf_counter() - start, "names": len(index), "lists": len(index.centroids)}
+
+    start = time.perf_counter()
+    results["added"] = index.update(names)
+    results["update_seconds"] = time.perf_counter() - start
+
+    dish_index = DishIndex(names)
+    results["fuzzy"] = latencies(lambda query: dish_index.search(query, limit=5, score_cutoff=60), queries)
+    for nprobe in args.nprobe:
+        results[f"nprobe={nprobe}"] = {
+            **latencies(lambda query: index.search(query, limit=5, nprobe=nprobe), queries),
+            "recall@10": recall(index, queries[:50], nprobe),
+        }
+
+    print(f"{results['names']} names in {results['lists']} lists, built in {results['build_seconds']:.1f} s, "
+          f"{results['added']} added in {results['update_seconds']:.2f} s")
+    print(f"{'search':>12} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8} {'recall@10':>10}")
+    for name, result in results.items():
+        if isinstance(result, dict):
+            print(f"{name:>12} {result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f} {result['max_ms']:>8.2f} "
+                  f"{result.get('recall@10', float('nan')):>10.3f}")
+
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
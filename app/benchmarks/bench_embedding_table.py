@@ -0,0 +1,99 @@
+import argparse
+import json
+import os
+import tempfile
+
+import numpy as np
+
+from benchmarks.stub_models import install_stub_models
+from benchmarks.synthetic import make_taste_dataset
+from benchmarks.timing import measure
+from embedding_table import TABLE_DTYPES, EmbeddingTable, flavor_vocabulary, frequent_keywords
+from keyword_extractor import extract_keywords_batch
+from semantic_checker import MODEL_NAME, embedding_service
+import addmatchscore
+
+
+def score(data):
+    """
+    Match scores and edibility of a dataset, in bulk mode.
+    """
+    edibility, match_scores = addmatchscore.score_rows_bulk(data.copy())
+    return np.asarray(match_scores), np.asarray(edibility)
+
+
+def drift(reference, scores, reference_edibility, edibility):
+    """
+    How far quantized scores are from the float32 ones.
+    """
+    difference = np.abs(scores - reference)
+    return {
+        "max_abs_error": float(difference.max()),
+        "mean_abs_error": float(difference.mean()),
+        "edibility_flips": int((edibility != reference_edibility).sum()),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Accuracy drift and speedup of the quantized embedding table.")
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--repetition", type=float, default=0.5)
+    parser.add_argument("--keywords", type=int, default=None, help="keep only the most frequent keywords")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--stub-models", action="store_true", help="use the offline stub encoder")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    if args.stub_models:
+        install_stub_models()
+
+    data = make_taste_dataset(args.rows, args.repetition)
+    text_counts = data['user_flavor'].value_counts()
+    terms = flavor_vocabulary(data['flavors'].unique()) + frequent_keywords(
+        text_counts.index.tolist(), args.keywords or len(text_counts) * 8, text_counts.tolist()
+    )
+
+    # Keywords and flavors the table misses are still encoded live
+    vocabulary = {keyword for keywords in extract_keywords_batch(text_counts.index.tolist()) for keyword in keywords}
+    vocabulary.update(flavor.strip() for flavors in data['flavors'].unique() for flavor in flavors.split(", "))
+    out_of_vocabulary = len(vocabulary - set(terms))
+
+    # Reference: every embedding encoded live, in float32
+    embedding_service.table = None
+    reference, reference_edibility = score(data)
+    results = {"float32": {"seconds": measure(lambda: score(data), args.repeat, setup=embedding_service.clear)}}
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for dtype in TABLE_DTYPES:
+            path = os.path.join(tmp_dir, dtype)
+            embedding_service.table = None
+            EmbeddingTable.build(terms, embedding_service.encode, MODEL_NAME, dtype).save(path)
+
+            # Lookups go through the memory-mapped file, as in production
+            embedding_service.table = EmbeddingTable.load(path)
+            scores, edibility = score(data)
+            results[dtype] = {
+                "seconds": measure(lambda: score(data), args.repeat, setup=embedding_service.clear),
+                "table_mb": sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path)) / 2**20,
+                **drift(reference, scores, reference_edibility, edibility),
+            }
+
+    embedding_service.table = None
+
+    baseline = results["float32"]["seconds"]["median"]
+    print(f"{args.rows} rows, {len(terms)} table terms, {out_of_vocabulary} keywords/flavors encoded live")
+    print(f"{'':>8} {'seconds':>9} {'speedup':>8} {'table MB':>9} {'max err':>9} {'mean err':>9} {'flips':>6}")
+    for name, result in results.items():
+        seconds = result["seconds"]["median"]
+        print(f"{name:>8} {seconds:>9.3f} {baseline / seconds:>8.2f} {result.get('table_mb', 0):>9.2f} "
+              f"{result.get('max_abs_error', 0):>9.5f} {result.get('mean_abs_error', 0):>9.6f} "
+              f"{result.get('edibility_flips', 0):>6}")
+
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump({"rows": args.rows, "terms": len(terms), "out_of_vocabulary": out_of_vocabulary,
+                       "results": results}, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import argparse
+import gc
+import json
+import tracemalloc
+
+from benchmarks.synthetic import make_flavor_database
+from benchmarks.timing import measure
+from flavor_sets import FlavorVocabulary, contains_all, intersects
+
+QUERY_FLAVORS = {"sweet", "salty"}
+
+
+def retained_bytes(build):
+    """
+    Python heap bytes still held by what `build` returns.
+    """
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return result, retained
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory and set operations: flavor strings/sets vs bitmasks.")
+    parser.add_argument("--dishes", type=int, default=1000000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    column = make_flavor_database(args.dishes)['predicted_flavors']
+
+    lists, lists_bytes = retained_bytes(lambda: column.str.split(", ").tolist())
+    sets, sets_bytes = retained_bytes(lambda: [set(flavors) for flavors in lists])
+    vocabulary = FlavorVocabulary()
+    masks, _ = retained_bytes(lambda: vocabulary.encode_column(column))
+    query = vocabulary.words_of(QUERY_FLAVORS)
+    memory_mb = {
+        "strings": column.memory_usage(deep=True, index=False) / 2**20,
+        "lists": lists_bytes / 2**20,
+        "sets": sets_bytes / 2**20,
+        "masks": masks.nbytes / 2**20,
+    }
+
+    seconds = {
+        "encode_masks": measure(lambda: FlavorVocabulary().encode_column(column), args.repeat),
+        "contains_all.sets": measure(lambda: [QUERY_FLAVORS <= flavors for flavors in sets], args.repeat),
+        "contains_all.masks": measure(lambda: contains_all(masks, query), args.repeat),
+        "contains_any.sets": measure(lambda: [not QUERY_FLAVORS.isdisjoint(flavors) for flavors in sets], args.repeat),
+        "contains_any.masks": measure(lambda: intersects(masks, query), args.repeat),
+    }
+    if (contains_all(masks, query).tolist() != [QUERY_FLAVORS <= flavors for flavors in sets]
+            or intersects(masks, query).tolist() != [not QUERY_FLAVORS.isdisjoint(flavors) for flavors in sets]):
+        raise AssertionError("bitmask results differ from the string sets")
+
+    print(f"{args.dishes} dishes, {len(vocabulary)} flavors, {masks.shape[1]} uint64 word(s) per dish")
+    for name, megabytes in memory_mb.items():
+        print(f"{name:>20} {megabytes:>9.1f} MB")
+    for name, timing in seconds.items():
+        print(f"{name:>20} {timing['median'] * 1000:>9.1f} ms")
+
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump({"dishes": args.dishes, "memory_mb": memory_mb, "seconds": seconds}, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+import argparse
+import json
+import subprocess
+import sys
+
+MODULES = [
+    "semantic_checker",
+    "pdf_processor",
+    "synonym_index",
+    "addmatchscore",
+    "app",
+    "scoring_service",
+]
+
+IMPORT_SNIPPET = "import time; start = time.perf_counter(); import {module}; print(time.perf_counter() - start)"
+
+
+def cold_import_time(module):
+    """
+    Seconds to import `module` in a fresh interpreter.
+    """
+    result = subprocess.run(
+        [sys.executable, "-c", IMPORT_SNIPPET.format(module=module)],
+        capture_output=True, text=True, check=True,
+    )
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def slowest_imports(module, top=5):
+    """
+    Heaviest direct imports of `module`, as (cumulative microseconds, name), from `python -X importtime`.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, check=True,
+    )
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        entries.append((depth, int(cumulative), name.strip()))
+
+    # Children are listed just before their parent
+    position = max(i for i, (depth, _, name) in enumerate(entries) if depth == 0 and name == module)
+    children = []
+    for depth, cumulative, name in reversed(entries[:position]):
+        if depth == 0:
+            break
+        if depth == 1:
+            children.append((cumulative, name))
+    return sorted(children, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold-start import time of the scoring modules.")
+    parser.add_argument("modules", nargs="*", default=MODULES)
+    parser.add_argument("--repeat", type=int, default=3, help="best of this many fresh interpreters")
+    parser.add_argument("--json", help="also write the results to this file")
+    parser.add_argument("--details", action="store_true", help="show the heaviest top-level imports")
+    args = parser.parse_args()
+
+    results = {}
+    for module in args.modules:
+        results[module] = min(cold_import_time(module) for _ in range(args.repeat))
+        print(f"{module:>20}: {results[module] * 1000:8.1f} ms")
+        if args.details:
+            for cumulative, name in slowest_imports(module):
+                print(f"{'':>22}{name}: {cumulative / 1000:.1f} ms")
+
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump({"import_seconds": results}, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
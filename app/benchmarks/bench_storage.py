@@ -0,0 +1,100 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.synthetic import make_flavor_database, make_taste_dataset
+from columnar_store import binary_path, convert_csv
+
+# Loads `path` with `reader` in a fresh interpreter and reports seconds and the peak RSS growth (KiB).
+# Writing 5 to clear_refs resets the peak (VmHWM) to the current RSS, so the
+# transient memory of pandas/pyarrow imports is not counted.
+LOAD_SNIPPET = """
+import json, time
+import pandas as pd
+import pyarrow.parquet
+from columnar_store import read_table
+
+def status(field):
+    with open("/proc/self/status") as file:
+        return next(int(line.split()[1]) for line in file if line.startswith(field + ":"))
+
+with open("/proc/self/clear_refs", "w") as file:
+    file.write("5")
+before = status("VmRSS")
+start = time.perf_counter()
+data = {reader}({path!r}, {columns_argument}={columns!r})
+seconds = time.perf_counter() - start
+print(json.dumps({{"seconds": seconds, "rss_kib": status("VmHWM") - before, "rows": len(data)}}))
+"""
+
+# (dataset, columns read) cases; None reads every column
+CASES = [
+    ("flavor_database", None),
+    ("taste_dataset", None),
+    ("taste_dataset", ["flavors", "user_flavor"]),
+]
+
+
+def load_in_subprocess(path, columns):
+    """
+    Load time and RSS growth of reading `path` in a fresh interpreter.
+
+    CSV files are read with pandas directly: read_table would pick up their Parquet copy.
+    """
+    if path.endswith(".parquet"):
+        reader, columns_argument = "read_table", "columns"
+    else:
+        reader, columns_argument = "pd.read_csv", "usecols"
+    snippet = LOAD_SNIPPET.format(reader=reader, path=path, columns_argument=columns_argument, columns=columns)
+    result = subprocess.run(
+        [sys.executable, "-c", snippet],
+        capture_output=True, text=True, check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def best_of(path, columns, repeat):
+    runs = [load_in_subprocess(path, columns) for _ in range(repeat)]
+    return {"seconds": min(run["seconds"] for run in runs), "rss_kib": min(run["rss_kib"] for run in runs)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare CSV and Parquet load time and memory.")
+    parser.add_argument("--rows", type=int, default=500000)
+    parser.add_argument("--repeat", type=int, default=3, help="best of this many fresh interpreters")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        datasets = {
+            "flavor_database": make_flavor_database(args.rows),
+            "taste_dataset": make_taste_dataset(args.rows),
+        }
+        csv_paths = {}
+        for name, data in datasets.items():
+            csv_paths[name] = os.path.join(tmp_dir, f"{name}.csv")
+            data.to_csv(csv_paths[name], index=False)
+            convert_csv(csv_paths[name])
+
+        print(f"{args.rows} rows")
+        print(f"{'dataset':>34} {'format':>8} {'MB':>8} {'seconds':>8} {'RSS MB':>8}")
+        for name, columns in CASES:
+            label = name if columns is None else f"{name}[{','.join(columns)}]"
+            for file_format, path in [("csv", csv_paths[name]), ("parquet", binary_path(csv_paths[name]))]:
+                result = best_of(path, columns, args.repeat)
+                result["file_mb"] = os.path.getsize(path) / 2**20
+                results[f"{label}/{file_format}"] = result
+                print(f"{label:>34} {file_format:>8} {result['file_mb']:>8.1f} "
+                      f"{result['seconds']:>8.3f} {result['rss_kib'] / 1024:>8.1f}")
+
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump({"rows": args.rows, "load": results}, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
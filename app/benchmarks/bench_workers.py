@@ -0,0 +1,35 @@
+import argparse
+import os
+import tempfile
+import time
+
+from addmatchscore import process_dataset
+from benchmarks.synthetic import write_taste_dataset
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure process_dataset scaling across worker processes.")
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--repetition", type=float, default=0.2)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        input_csv = write_taste_dataset(os.path.join(tmp_dir, "input.csv"), args.rows, args.repetition)
+        output_csv = os.path.join(tmp_dir, "output.csv")
+
+        results = []
+        for workers in range(1, args.max_workers + 1):
+            start = time.perf_counter()
+            process_dataset(input_csv, output_csv, workers=workers)
+            results.append((workers, time.perf_counter() - start))
+
+    baseline = results[0][1]
+    print(f"\n{args.rows} rows, repetition {args.repetition}")
+    print(f"{'workers':>8} {'seconds':>10} {'rows/s':>10} {'speedup':>8}")
+    for workers, seconds in results:
+        print(f"{workers:>8} {seconds:>10.2f} {args.rows / seconds:>10.0f} {baseline / seconds:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+import contextlib
+import io
+import os
+import tempfile
+
+from benchmarks.micro import clear_caches
+from benchmarks.synthetic import write_taste_dataset
+from benchmarks.timing import measure
+from addmatchscore import process_dataset
+
+# The row-by-row loop is only timed on this many rows
+LOOP_ROWS = 2000
+
+
+def run_end_to_end(size, repetition, repeat, workers=1):
+    """
+    Time full process_dataset runs on a synthetic CSV, from cold caches.
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        input_csv = write_taste_dataset(os.path.join(tmp_dir, "input.csv"), size, repetition)
+        loop_csv = write_taste_dataset(os.path.join(tmp_dir, "loop.csv"), min(size, LOOP_ROWS), repetition)
+        output_csv = os.path.join(tmp_dir, "output.csv")
+
+        runs = {
+            "process_dataset.bulk": lambda: process_dataset(input_csv, output_csv),
+            "process_dataset.loop": lambda: process_dataset(loop_csv, output_csv, bulk=False),
+            "process_dataset.streaming": lambda: process_dataset(input_csv, output_csv, chunksize=max(1, size // 10)),
+        }
+        if workers > 1:
+            runs[f"process_dataset.workers{workers}"] = lambda: process_dataset(input_csv, output_csv, workers=workers)
+
+        for name, run in runs.items():
+            with contextlib.redirect_stdout(io.StringIO()):
+                results[name] = measure(run, repeat, setup=clear_caches)
+
+    return results
@@ -0,0 +1,93 @@
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+from urllib.parse import quote
+
+DESCRIPTIONS = ["too sour", "tastes sour", "very sweet", "a bit bitter", "smells rotten", "salty and smoky", "bland"]
+
+
+async def request(reader, writer, method, path, payload=None):
+    """
+    Send one keep-alive HTTP request and return (status, decoded JSON body).
+    """
+    body = json.dumps(payload).encode() if payload is not None else b""
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n".encode() + body
+    )
+    await writer.drain()
+
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode().partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    return status, json.loads(await reader.readexactly(length))
+
+
+async def client(host, port, dishes, deadline, score_ratio, latencies, errors):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while time.perf_counter() < deadline:
+            dish = random.choice(dishes)
+            start = time.perf_counter()
+            if random.random() < score_ratio:
+                status, _ = await request(reader, writer, "POST", "/score",
+                                          {"dish": dish, "description": random.choice(DESCRIPTIONS)})
+                kind = "score"
+            else:
+                status, _ = await request(reader, writer, "GET", f"/dishes/search?q={quote(dish[:-1])}")
+                kind = "search"
+            latencies[kind].append(time.perf_counter() - start)
+            if status != 200:
+                errors.append(status)
+    finally:
+        writer.close()
+
+
+async def run(args):
+    reader, writer = await asyncio.open_connection(args.host, args.port)
+    _, found = await request(reader, writer, "GET", f"/dishes/search?q={quote(args.seed_query)}&limit=50")
+    writer.close()
+    dishes = [dish["name"] for dish in found["dishes"]] or [args.seed_query]
+
+    latencies = {"score": [], "search": []}
+    errors = []
+    start = time.perf_counter()
+    deadline = start + args.duration
+    await asyncio.gather(*[
+        client(args.host, args.port, dishes, deadline, args.score_ratio, latencies, errors)
+        for _ in range(args.concurrency)
+    ])
+    elapsed = time.perf_counter() - start
+
+    total = sum(len(values) for values in latencies.values())
+    print(f"{total} requests in {elapsed:.1f}s with {args.concurrency} clients: {total / elapsed:.1f} req/s, "
+          f"{len(errors)} errors")
+    for kind, values in latencies.items():
+        if len(values) < 2:
+            continue
+        cut_points = statistics.quantiles(values, n=100)
+        print(f"{kind:>7}: n={len(values)} p50={cut_points[49] * 1000:.1f}ms p99={cut_points[98] * 1000:.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the scoring service.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds")
+    parser.add_argument("--score-ratio", type=float, default=0.8, help="share of /score requests")
+    parser.add_argument("--seed-query", default="chicken", help="search used to pick dishes to query")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
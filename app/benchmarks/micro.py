@@ -0,0 +1,129 @@
+import random
+
+from benchmarks.synthetic import FLAVORS, make_flavor_database, make_recipes, make_taste_dataset
+from benchmarks.timing import measure
+from dish_index import DishIndex
+from flavor_mapper import map_flavors
+from keyword_extractor import clear_keyword_cache
+from semantic_checker import embedding_service, semantic_similarity
+from synonym_index import expand_flavor_tuple
+import addmatchscore
+import app
+import pdf_processor
+
+
+def clear_caches():
+    """
+    Reset the in-process caches so a run measures cold behaviour.
+    """
+    embedding_service.clear()
+    clear_keyword_cache()
+    expand_flavor_tuple.cache_clear()
+
+
+def bench_compare_flavors(size, repetition, repeat):
+    data = make_taste_dataset(size, repetition)
+    rows = list(zip(data['user_flavor'], data['flavors']))
+    expanded = {flavors: pdf_processor.expand_flavor_keywords(flavors.split(", ")) for _, flavors in rows}
+
+    def run():
+        for user_flavor, flavors in rows:
+            for flavor in flavors.split(", "):
+                addmatchscore.compare_flavors(user_flavor, flavor.strip(), expanded[flavors])
+
+    return {
+        "compare_flavors.cold": measure(run, repeat, setup=clear_caches),
+        "compare_flavors.warm": measure(run, repeat),
+    }
+
+
+def bench_scoring_modes(size, repetition, repeat):
+    data = make_taste_dataset(size, repetition)
+    rows = [
+        (user_flavor, [flavor.strip() for flavor in flavors.split(", ")],
+         pdf_processor.expand_flavor_keywords(flavors.split(", ")))
+        for user_flavor, flavors in zip(data['user_flavor'], data['flavors'])
+    ]
+
+    def run(mode):
+        for user_flavor, flavors, expanded in rows:
+            addmatchscore.score_row(user_flavor, flavors, expanded, mode)
+
+    return {
+        f"score_row.{mode}.cold": measure(lambda: run(mode), repeat, setup=clear_caches)
+        for mode in addmatchscore.SCORING_MODES
+    }
+
+
+def bench_semantic_similarity(size, repetition, repeat):
+    data = make_taste_dataset(size, repetition)
+    rng = random.Random(0)
+    pairs = [(text.split()[-1], rng.choice(FLAVORS)) for text in data['user_flavor']]
+
+    def run():
+        for keyword, flavor in pairs:
+            semantic_similarity(keyword, flavor)
+
+    return {
+        "semantic_similarity.cold": measure(run, repeat, setup=clear_caches),
+        "semantic_similarity.warm": measure(run, repeat),
+    }
+
+
+def bench_expand_flavor_keywords(size, repetition, repeat):
+    flavor_lists = [flavors.split(", ") for flavors in make_taste_dataset(size, repetition)['flavors']]
+
+    def run():
+        for flavors in flavor_lists:
+            pdf_processor.expand_flavor_keywords(flavors)
+
+    return {
+        "expand_flavor_keywords.cold": measure(run, repeat, setup=expand_flavor_tuple.cache_clear),
+        "expand_flavor_keywords.warm": measure(run, repeat),
+    }
+
+
+def bench_map_flavors(size, repetition, repeat):
+    recipes = make_recipes(size)
+    dish_names = recipes['Title'].tolist()
+    ingredients = recipes['Ingredients'].tolist()
+    return {
+        "map_flavors": measure(lambda: map_flavors(dish_names, ingredients, FLAVORS), repeat),
+    }
+
+
+def bench_find_similar_dishes(size, repetition, repeat):
+    flavor_data = make_flavor_database(size)
+    queries = [name[:-1] for name in flavor_data['dish_name'].sample(50, random_state=0)]
+    index = DishIndex.from_frame(flavor_data)
+
+    def run():
+        for query in queries:
+            app.find_similar_dishes(query, flavor_data, index)
+
+    return {
+        "dish_index.build": measure(lambda: DishIndex.from_frame(flavor_data), max(1, repeat // 2)),
+        "find_similar_dishes": measure(run, repeat),
+    }
+
+
+MICROBENCHMARKS = {
+    "compare_flavors": bench_compare_flavors,
+    "scoring_modes": bench_scoring_modes,
+    "semantic_similarity": bench_semantic_similarity,
+    "expand_flavor_keywords": bench_expand_flavor_keywords,
+    "map_flavors": bench_map_flavors,
+    "find_similar_dishes": bench_find_similar_dishes,
+}
+
+
+def run_microbenchmarks(size, repetition, repeat, names=None):
+    """
+    Run the selected microbenchmarks and return {benchmark: timing}.
+    """
+    results = {}
+    for name, bench in MICROBENCHMARKS.items():
+        if names and name not in names:
+            continue
+        results.update(bench(size, repetition, repeat))
+    return results
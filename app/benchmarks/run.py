@@ -0,0 +1,87 @@
+import argparse
+import json
+import platform
+import sys
+import time
+
+# Slowdown (as a fraction of the baseline median) reported as a regression
+DEFAULT_THRESHOLD = 0.2
+
+
+def compare_to_baseline(results, baseline, threshold):
+    """
+    Print median timings against a baseline and return the regressed benchmark names.
+    """
+    regressions = []
+    print(f"\n{'benchmark':<34} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name, timing in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            print(f"{name:<34} {'-':>12} {timing['median'] * 1000:>10.2f}ms {'new':>8}")
+            continue
+        change = timing['median'] / previous['median'] - 1
+        flag = "  REGRESSION" if change > threshold else ""
+        print(f"{name:<34} {previous['median'] * 1000:>10.2f}ms {timing['median'] * 1000:>10.2f}ms "
+              f"{change:>+7.0%}{flag}")
+        if change > threshold:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the flavor scoring pipeline.")
+    parser.add_argument("--size", type=int, default=2000, help="rows / dishes in the synthetic data")
+    parser.add_argument("--repetition", type=float, default=0.5, help="share of repeated user descriptions")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--only", nargs="*", help="microbenchmarks to run (default: all)")
+    parser.add_argument("--no-e2e", action="store_true", help="skip end-to-end process_dataset runs")
+    parser.add_argument("--workers", type=int, default=1, help="also time process_dataset with this many workers")
+    parser.add_argument("--stub-models", action="store_true",
+                        help="use an offline hashing encoder and an empty WordNet instead of the real models")
+    parser.add_argument("--output", help="write results as JSON")
+    parser.add_argument("--baseline", help="JSON results to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    args = parser.parse_args()
+    # Spawned scoring workers load their own models, which the stubs do not reach
+    if args.stub_models and args.workers > 1 and not args.no_e2e:
+        parser.error("--stub-models cannot be combined with --workers > 1 (workers would load the real models)")
+
+    if args.stub_models:
+        from benchmarks.stub_models import install_stub_models
+        install_stub_models()
+
+    from benchmarks.micro import run_microbenchmarks
+    from benchmarks.e2e import run_end_to_end
+
+    results = run_microbenchmarks(args.size, args.repetition, args.repeat, args.only)
+    if not args.no_e2e:
+        results.update(run_end_to_end(args.size, args.repetition, args.repeat, args.workers))
+
+    report = {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "size": args.size,
+            "repetition": args.repetition,
+            "stub_models": args.stub_models,
+        },
+        "results": results,
+    }
+
+    for name, timing in results.items():
+        print(f"{name:<34} median {timing['median'] * 1000:10.2f} ms  min {timing['min'] * 1000:10.2f} ms")
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)["results"]
+        if compare_to_baseline(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
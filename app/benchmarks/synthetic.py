@@ -0,0 +1,110 @@
+import random
+
+import pandas as pd
+
+FLAVORS = [
+    "sweet", "sugary", "caramelized", "honeyed",
+    "spicy", "hot", "pungent", "peppery",
+    "savory", "umami", "meaty", "brothy",
+    "sour", "tangy", "tart", "acidic",
+    "bitter", "astringent", "sharp",
+    "salty", "briny", "cured",
+    "fruity", "citrusy", "herbal", "earthy",
+    "nutty", "smoky", "creamy", "buttery"
+]
+
+DESCRIPTION_TEMPLATES = [
+    "it tastes {}",
+    "too {}",
+    "very {} and a bit {}",
+    "a {} flavor",
+    "smells {} but tastes {}",
+    "kind of {}",
+]
+
+OFF_FLAVORS = ["rotten", "stale", "rancid", "moldy", "bland", "fishy", "metallic", "funky"]
+
+DISH_WORDS = [
+    "chicken", "beef", "pork", "tofu", "salmon", "shrimp", "lentil", "mushroom",
+    "curry", "stew", "soup", "salad", "pie", "tart", "tacos", "noodles",
+    "fried", "roasted", "grilled", "spicy", "lemon", "garlic", "honey", "ginger",
+    "spaghetti", "bolognese", "risotto", "ramen", "masala", "teriyaki", "pesto", "chili",
+]
+
+INGREDIENTS = [
+    "sugar", "brown sugar", "honey", "maple syrup", "chili pepper", "black pepper",
+    "hot sauce", "paprika", "smoked paprika", "salt", "sea salt", "soy sauce",
+    "lemon juice", "lime", "vinegar", "orange zest", "butter", "cream", "milk",
+    "peanuts", "almonds", "walnuts", "thyme", "basil", "rosemary", "beef broth",
+    "chicken stock", "coffee", "cocoa", "mushrooms", "garlic", "onion", "tomato",
+]
+
+
+def make_taste_dataset(rows, repetition=0.5, seed=0):
+    """
+    Build a taste dataset with food_name, flavors and user_flavor columns.
+
+    `repetition` is the probability that a row reuses an earlier
+    (flavors, user_flavor) pair, as real user descriptions often do.
+    """
+    rng = random.Random(seed)
+    records = []
+
+    for i in range(rows):
+        if records and rng.random() < repetition:
+            previous = rng.choice(records)
+            records.append({**previous, "food_name": f"dish {i}"})
+            continue
+
+        flavors = rng.sample(FLAVORS, rng.randint(1, 4))
+        template = rng.choice(DESCRIPTION_TEMPLATES)
+        words = [rng.choice(FLAVORS + OFF_FLAVORS) for _ in range(template.count("{}"))]
+        records.append({
+            "food_name": f"dish {i}",
+            "flavors": ", ".join(flavors),
+            "user_flavor": template.format(*words),
+        })
+
+    return pd.DataFrame(records)
+
+
+def write_taste_dataset(path, rows, repetition=0.5, seed=0):
+    """
+    Write a synthetic taste dataset to a CSV file and return its path.
+    """
+    make_taste_dataset(rows, repetition, seed).to_csv(path, index=False)
+    return path
+
+
+def make_dish_names(count, seed=0):
+    """
+    Distinct-looking dish names built from a small vocabulary.
+    """
+    rng = random.Random(seed)
+    names = []
+    for i in range(count):
+        words = rng.sample(DISH_WORDS, rng.randint(2, 3))
+        names.append(" ".join(words).title() + (f" {i}" if rng.random() < 0.3 else ""))
+    return names
+
+
+def make_flavor_database(dishes, seed=0):
+    """
+    Build a flavor database with dish_name and predicted_flavors columns.
+    """
+    rng = random.Random(seed)
+    return pd.DataFrame({
+        "dish_name": make_dish_names(dishes, seed),
+        "predicted_flavors": [", ".join(rng.sample(FLAVORS, rng.randint(1, 4))) for _ in range(dishes)],
+    })
+
+
+def make_recipes(dishes, seed=0):
+    """
+    Build a recipe dataset with Title and comma-separated Ingredients columns.
+    """
+    rng = random.Random(seed)
+    return pd.DataFrame({
+        "Title": make_dish_names(dishes, seed),
+        "Ingredients": [", ".join(rng.sample(INGREDIENTS, rng.randint(2, 8))) for _ in range(dishes)],
+    })
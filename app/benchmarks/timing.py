@@ -0,0 +1,27 @@
+import statistics
+import time
+
+
+def measure(func, repeat=5, number=1, setup=None):
+    """
+    Time `number` calls of `func`, `repeat` times.
+
+    `setup` runs before each repeat and is not timed (e.g. to clear caches).
+    Returns seconds per call as min/median/max over the repeats.
+    """
+    timings = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        timings.append((time.perf_counter() - start) / number)
+
+    return {
+        "min": min(timings),
+        "median": statistics.median(timings),
+        "max": max(timings),
+        "repeat": repeat,
+        "number": number,
+    }
@@ -0,0 +1,341 @@
+import json
+import operator
+import os
+
+import pandas as pd
+
+from instrumentation import metrics
+
+# Comma-joined flavor columns, stored as lists of flavors in Parquet
+FLAVOR_LIST_COLUMNS = ("predicted_flavors", "flavors")
+FLAVOR_SEPARATOR = ", "
+
+# Rows per Parquet row group: the unit skipped by predicate pushdown
+ROW_GROUP_SIZE = 100000
+
+# Parquet metadata key holding the (mtime_ns, size) of the CSV it was converted from
+SOURCE_SIGNATURE_KEY = b"source_signature"
+
+FILTER_OPERATORS = {
+    "==": operator.eq,
+    "=": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+
+# Filters on a flavor column holding every / any of a collection of flavors (see flavor_sets)
+FLAVOR_SET_OPERATORS = ("contains all", "contains any")
+
+
+def binary_path(csv_path):
+    """
+    Path of the Parquet copy of a CSV file.
+    """
+    return os.path.splitext(csv_path)[0] + ".parquet"
+
+
+def file_signature(path):
+    stat = os.stat(path)
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def resolve_path(path):
+    """
+    File to read `path` from: its Parquet copy when one exists and is up to date.
+    """
+    if path.endswith(".parquet"):
+        return path
+
+    parquet_path = binary_path(path)
+    if not os.path.exists(parquet_path):
+        return path
+    if not os.path.exists(path):
+        return parquet_path
+
+    import pyarrow.parquet as pq
+
+    metadata = pq.read_schema(parquet_path).metadata or {}
+    signature = metadata.get(SOURCE_SIGNATURE_KEY)
+    if signature and json.loads(signature) == file_signature(path):
+        return parquet_path
+    return path
+
+
+def is_string_type(arrow_type):
+    import pyarrow as pa
+
+    return pa.types.is_string(arrow_type) or pa.types.is_large_string(arrow_type)
+
+
+def is_list_type(arrow_type):
+    import pyarrow as pa
+
+    return pa.types.is_list(arrow_type) or pa.types.is_large_list(arrow_type)
+
+
+def to_arrow(frame):
+    """
+    Arrow table of a DataFrame, with the flavor columns split into lists.
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    for column in FLAVOR_LIST_COLUMNS:
+        if column in table.column_names and is_string_type(table.schema.field(column).type):
+            position = table.column_names.index(column)
+            flavors = pc.split_pattern(table[column].cast(pa.string()), FLAVOR_SEPARATOR)
+            table = table.set_column(position, column, flavors)
+    return table
+
+
+def to_frame(table, flavor_lists=False):
+    """
+    DataFrame of an Arrow table, with flavor lists joined back into strings unless `flavor_lists`.
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    list_columns = [
+        column for column in FLAVOR_LIST_COLUMNS
+        if column in table.column_names and is_list_type(table.schema.field(column).type)
+    ]
+    if flavor_lists:
+        # Converted separately: the stored pandas metadata describes them as strings
+        frame = table.drop_columns(list_columns).to_pandas()
+        for column in list_columns:
+            frame.insert(table.column_names.index(column), column, table[column].to_pylist())
+        return frame
+
+    for column in list_columns:
+        position = table.column_names.index(column)
+        table = table.set_column(position, column, pc.binary_join(table[column], FLAVOR_SEPARATOR))
+    return table.to_pandas()
+
+
+def flavor_set_mask(flavor_lists, op, flavors):
+    """
+    Boolean per row of comma-joined flavor lists: whether it holds all ("contains all") or any of `flavors`.
+
+    Each distinct list is parsed once into a bitmask, and the test is a
+    bitwise operation over the whole column.
+    """
+    from flavor_sets import FlavorVocabulary, contains_all, intersects
+
+    vocabulary = FlavorVocabulary()
+    masks = vocabulary.encode_column(flavor_lists)
+    query = vocabulary.words_of(flavors)
+    return contains_all(masks, query) if op == "contains all" else intersects(masks, query)
+
+
+def is_flavor_filter(spec):
+    """
+    Whether a (column, op, value) filter compares flavor lists, which Parquet cannot push down.
+    """
+    return spec[0] in FLAVOR_LIST_COLUMNS or spec[1] in FLAVOR_SET_OPERATORS
+
+
+def filter_mask(frame, filters):
+    """
+    Boolean mask of the rows matching all (column, op, value) filters.
+    """
+    mask = pd.Series(True, index=frame.index)
+    for column, op, value in filters:
+        if op in FLAVOR_SET_OPERATORS:
+            mask &= flavor_set_mask(frame[column], op, value)
+        elif op == "in":
+            mask &= frame[column].isin(value)
+        elif op == "not in":
+            mask &= ~frame[column].isin(value)
+        else:
+            mask &= FILTER_OPERATORS[op](frame[column], value)
+    return mask
+
+
+def table_columns(path):
+    """
+    Column names of a table, without loading it.
+    """
+    source = resolve_path(path)
+    if source.endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        return pq.read_schema(source).names
+    return list(pd.read_csv(source, nrows=0).columns)
+
+
+@metrics.timed("io.read_table")
+def read_table(path, columns=None, filters=None, flavor_lists=False, dtype=None):
+    """
+    Load a table, from its Parquet copy when there is an up-to-date one.
+
+    Only `columns` are read, converted to `dtype` if given. `filters` is a list of (column, op, value)
+    tuples that must all hold; on Parquet they are pushed down so that row
+    groups which cannot match are not read. Filters on the flavor columns
+    compare their comma-joined strings, like on the CSV, so they are not
+    pushed down but applied after reading. FLAVOR_SET_OPERATORS select the
+    flavor lists holding all or any of some flavors, e.g.
+    ("flavors", "contains all", ["sweet", "salty"]). Flavor columns are
+    returned as comma-joined strings, like the CSV, or as lists with `flavor_lists`.
+    """
+    source = resolve_path(path)
+
+    if source.endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        # Parquet stores the flavor columns as lists, which the pushed-down filters cannot compare to strings
+        flavor_filters = [spec for spec in filters or () if is_flavor_filter(spec)]
+        pushed_filters = [spec for spec in filters or () if not is_flavor_filter(spec)]
+        read_columns = columns
+        if columns and flavor_filters:
+            read_columns = list(dict.fromkeys([*columns, *(spec[0] for spec in flavor_filters)]))
+
+        table = pq.read_table(source, columns=read_columns, filters=pushed_filters or None)
+        if flavor_filters:
+            data = to_frame(table)
+            data = data[filter_mask(data, flavor_filters)].reset_index(drop=True)
+            if columns:
+                data = data[list(columns)]
+            if flavor_lists:
+                for column in FLAVOR_LIST_COLUMNS:
+                    if column in data:
+                        data[column] = data[column].str.split(FLAVOR_SEPARATOR)
+        else:
+            data = to_frame(table, flavor_lists)
+        return data.astype(dtype) if dtype else data
+
+    read_columns = columns
+    if columns and filters:
+        read_columns = list(dict.fromkeys([*columns, *(spec[0] for spec in filters)]))
+    data = pd.read_csv(source, usecols=read_columns, dtype=dtype)
+    if filters:
+        data = data[filter_mask(data, filters)].reset_index(drop=True)
+    if columns:
+        data = data[list(columns)]
+    if flavor_lists:
+        for column in FLAVOR_LIST_COLUMNS:
+            if column in data:
+                data[column] = data[column].str.split(FLAVOR_SEPARATOR)
+    return data
+
+
+def iter_chunks(path, chunksize, start_chunk=0, columns=None, dtype=None):
+    """
+    Yield the table in DataFrames of `chunksize` rows, skipping the first `start_chunk` chunks.
+
+    Only `columns` are read, converted to `dtype` if given. Compressed CSVs
+    (.gz, .bz2, .zip, .xz, .zst) are decompressed as they are read.
+    """
+    chunks = _iter_chunks(resolve_path(path), chunksize, start_chunk, columns, dtype)
+    while True:
+        # Timed per chunk: the consumer's work between chunks is not I/O
+        with metrics.timer("io.read_chunk"):
+            chunk = next(chunks, None)
+        if chunk is None:
+            return
+        metrics.observe("io.chunk_rows", len(chunk))
+        yield chunk
+
+
+def _iter_chunks(source, chunksize, start_chunk, columns, dtype=None):
+
+    if not source.endswith(".parquet"):
+        # Skip already processed rows without parsing them (row 0 is the header)
+        skiprows = range(1, start_chunk * chunksize + 1) if start_chunk else None
+        yield from pd.read_csv(source, chunksize=chunksize, skiprows=skiprows, usecols=columns, dtype=dtype)
+        return
+
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    parquet_file = pq.ParquetFile(source)
+
+    # Whole row groups before the start are not read at all
+    skip = start_chunk * chunksize
+    row_groups = []
+    for row_group in range(parquet_file.num_row_groups):
+        rows = parquet_file.metadata.row_group(row_group).num_rows
+        if not row_groups and skip >= rows:
+            skip -= rows
+            continue
+        row_groups.append(row_group)
+    if not row_groups:
+        return
+
+    # Batches stop at row group boundaries, so regroup them into exact chunks
+    pending, pending_rows = [], 0
+    for batch in parquet_file.iter_batches(batch_size=chunksize, row_groups=row_groups, columns=columns):
+        if skip >= batch.num_rows:
+            skip -= batch.num_rows
+            continue
+        batch, skip = batch.slice(skip), 0
+        pending.append(batch)
+        pending_rows += batch.num_rows
+
+        while pending_rows >= chunksize:
+            table = pa.Table.from_batches(pending)
+            chunk = to_frame(table.slice(0, chunksize))
+            yield chunk.astype(dtype) if dtype else chunk
+            rest = table.slice(chunksize)
+            pending, pending_rows = rest.to_batches(), rest.num_rows
+
+    if pending_rows:
+        chunk = to_frame(pa.Table.from_batches(pending))
+        yield chunk.astype(dtype) if dtype else chunk
+
+
+def write_parquet(frame, parquet_path, source_signature=None):
+    """
+    Write a DataFrame as Parquet, recording the signature of the CSV it came from.
+    """
+    import pyarrow.parquet as pq
+
+    table = to_arrow(frame)
+    if source_signature:
+        metadata = dict(table.schema.metadata or {})
+        metadata[SOURCE_SIGNATURE_KEY] = json.dumps(source_signature).encode()
+        table = table.replace_schema_metadata(metadata)
+
+    tmp_path = parquet_path + ".tmp"
+    pq.write_table(table, tmp_path, row_group_size=ROW_GROUP_SIZE, compression="zstd")
+    os.replace(tmp_path, parquet_path)
+
+
+@metrics.timed("io.save_table")
+def save_table(frame, path):
+    """
+    Save a DataFrame as Parquet or CSV, depending on the extension of `path`.
+    """
+    if path.endswith(".parquet"):
+        write_parquet(frame, path)
+    else:
+        frame.to_csv(path, index=False)
+
+
+def convert_csv(csv_path, parquet_path=None):
+    """
+    Write the Parquet copy of a CSV file, which read_table then uses instead of it.
+    """
+    parquet_path = parquet_path or binary_path(csv_path)
+    # Signature taken before reading, so a concurrent edit makes the copy stale
+    signature = file_signature(csv_path)
+    write_parquet(pd.read_csv(csv_path), parquet_path, source_signature=signature)
+    return parquet_path
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Convert CSV files to Parquet copies used in their place.")
+    parser.add_argument("csv_paths", nargs="+")
+    args = parser.parse_args()
+
+    for csv_path in args.csv_paths:
+        print(f"{csv_path} -> {convert_csv(csv_path)}")
+
+
+if __name__ == "__main__":
+    main()
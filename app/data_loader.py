@@ -1,11 +1,53 @@
-import pandas as pd
+from columnar_store import iter_chunks, read_table
+from instrumentation import metrics
+
+# The only columns map_flavors needs, and their types (every other column of the corpus is skipped)
+INGREDIENT_DTYPES = {'Title': 'string', 'Ingredients': 'string'}
+
+# Recipes read at a time when streaming a corpus
+DEFAULT_CHUNKSIZE = 100000
+
+
+def aligned_records(data):
+    """
+    Rows with both a dish name and ingredients.
+
+    Dropping incomplete rows as a whole keeps every dish aligned with its
+    own ingredients.
+    """
+    complete = data.dropna(subset=list(INGREDIENT_DTYPES))
+    metrics.count("ingredients.incomplete_rows", len(data) - len(complete))
+    return complete
+
 
 def load_ingredients(dataset_path):
     """
     Load the ingredients and dish names from the dataset.
     """
-    data = pd.read_csv(dataset_path)
-    # Assuming the dataset has columns 'ingredients' and 'dish_name'
-    dish_names = data['Title'].dropna().tolist()
-    ingredients = data['Ingredients'].dropna().tolist()
-    return ingredients, dish_names
+    data = aligned_records(read_table(dataset_path, columns=list(INGREDIENT_DTYPES), dtype=INGREDIENT_DTYPES))
+    return data['Ingredients'].tolist(), data['Title'].tolist()
+
+
+def iter_ingredient_chunks(dataset_paths, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Yield aligned (dish_names, ingredients) lists of at most `chunksize` recipes.
+
+    `dataset_paths` is one path or several, read one after the other; CSVs
+    may be compressed. Memory use depends on `chunksize`, not on the size
+    of the corpus.
+    """
+    if isinstance(dataset_paths, str):
+        dataset_paths = [dataset_paths]
+    for dataset_path in dataset_paths:
+        for chunk in iter_chunks(dataset_path, chunksize, columns=list(INGREDIENT_DTYPES), dtype=INGREDIENT_DTYPES):
+            chunk = aligned_records(chunk)
+            if len(chunk):
+                yield chunk['Title'].tolist(), chunk['Ingredients'].tolist()
+
+
+def iter_ingredient_records(dataset_paths, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Yield aligned (dish name, ingredients) records, reading `chunksize` rows at a time.
+    """
+    for dish_names, ingredients in iter_ingredient_chunks(dataset_paths, chunksize):
+        yield from zip(dish_names, ingredients)
@@ -0,0 +1,141 @@
+import os
+import pickle
+
+import numpy as np
+from rapidfuzz import fuzz, process
+from rapidfuzz.utils import default_process
+
+from columnar_store import resolve_path
+
+# Most candidates (by shared trigrams) that are scored with rapidfuzz per query
+MAX_CANDIDATES = 2000
+
+
+def trigrams(text):
+    """
+    Character trigrams of a processed name, padded so short names have some.
+    """
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class DishIndex:
+    """
+    Fuzzy dish-name lookup over a prebuilt trigram index.
+
+    Names are matched like fuzzywuzzy's process.extract with fuzz.ratio did
+    (lowercased, punctuation stripped), but only candidates sharing trigrams
+    with the query and of a compatible length are scored, with rapidfuzz.
+    """
+
+    def __init__(self, dish_names, source_signature=None):
+        self.source_signature = source_signature
+        self.names = []
+        self.rows = {}
+
+        # One entry per distinct lowercased name, pointing at its first row
+        for row, name in enumerate(dish_names):
+            if not isinstance(name, str):
+                continue
+            name = name.lower()
+            if name not in self.rows:
+                self.rows[name] = row
+                self.names.append(name)
+
+        # Order names by processed length so a length range is a contiguous slice
+        processed = [default_process(name) for name in self.names]
+        order = sorted(range(len(self.names)), key=lambda name_id: len(processed[name_id]))
+        self.names = [self.names[name_id] for name_id in order]
+        self.processed = [processed[name_id] for name_id in order]
+        self.lengths = np.array([len(name) for name in self.processed], dtype=np.int32)
+
+        postings = {}
+        for name_id, name in enumerate(self.processed):
+            for trigram in trigrams(name):
+                postings.setdefault(trigram, []).append(name_id)
+        self.postings = {trigram: np.array(ids, dtype=np.int32) for trigram, ids in postings.items()}
+
+    @classmethod
+    def from_frame(cls, flavor_data, source_signature=None):
+        """
+        Build an index over the dish_name column of the flavor database.
+        """
+        return cls(flavor_data['dish_name'].tolist(), source_signature)
+
+    def candidates(self, query, score_cutoff):
+        """
+        Ids of names that may score above `score_cutoff`, best trigram overlap first.
+        """
+        query_trigrams = [self.postings[t] for t in trigrams(query) if t in self.postings]
+        if not query_trigrams:
+            return np.array([], dtype=np.int32)
+
+        # ratio = 2 * matches / total length, so lengths far from the query cannot pass
+        ratio = score_cutoff / 100
+        start = np.searchsorted(self.lengths, len(query) * ratio / (2 - ratio), side='left')
+        stop = np.searchsorted(self.lengths, len(query) * (2 - ratio) / ratio, side='right')
+
+        # Posting lists are sorted, so each one is cut down to that slice first
+        in_range = [ids[np.searchsorted(ids, start):np.searchsorted(ids, stop)] for ids in query_trigrams]
+        overlap = np.bincount(np.concatenate(in_range) - start, minlength=stop - start)
+        # Smallest overlap that still yields MAX_CANDIDATES names, ties in name order
+        names_with_overlap = np.cumsum(np.bincount(overlap)[::-1])[::-1]
+        min_overlap = max(int(np.searchsorted(-names_with_overlap, -MAX_CANDIDATES, side='right')) - 1, 1)
+
+        candidates = np.flatnonzero(overlap > min_overlap)
+        ties = np.flatnonzero(overlap == min_overlap)[:MAX_CANDIDATES - len(candidates)]
+        return np.concatenate([candidates, ties]) + start
+
+    def search(self, dish_name, limit=5, score_cutoff=60):
+        """
+        Return up to `limit` (name, score) pairs scoring above `score_cutoff`.
+        """
+        query = default_process(dish_name)
+        if not query:
+            return []
+
+        candidates = self.candidates(query, score_cutoff)
+        choices = [self.processed[name_id] for name_id in candidates]
+        matches = process.extract(query, choices, scorer=fuzz.ratio, limit=limit, score_cutoff=score_cutoff)
+
+        # Scores were whole numbers with fuzzywuzzy, keep comparing them that way
+        return [
+            (self.names[candidates[position]], round(score))
+            for _, score, position in matches
+            if round(score) > score_cutoff
+        ]
+
+    def row_for(self, dish_name):
+        """
+        Position of the first row with this (case-insensitive) dish name, or None.
+        """
+        return self.rows.get(dish_name.lower())
+
+    def save(self, path):
+        """
+        Persist the index.
+        """
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as file:
+            pickle.dump(self, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def for_csv(cls, csv_path, flavor_data, index_path=None):
+        """
+        Load the index saved next to `csv_path`, rebuilding it if the data changed.
+        """
+        index_path = index_path or csv_path + ".dishindex.pkl"
+        # The file the data is actually read from (CSV or its Parquet copy)
+        stat = os.stat(resolve_path(csv_path))
+        signature = (stat.st_mtime_ns, stat.st_size)
+
+        if os.path.exists(index_path):
+            with open(index_path, "rb") as file:
+                index = pickle.load(file)
+            if index.source_signature == signature:
+                return index
+
+        index = cls.from_frame(flavor_data, signature)
+        index.save(index_path)
+        return index
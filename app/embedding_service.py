@@ -0,0 +1,208 @@
+import atexit
+import os
+import re
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from instrumentation import metrics
+from model_registry import SENTENCE_BACKEND
+
+DEFAULT_BATCH_SIZE = 256
+DEFAULT_CACHE_SIZE = 20000
+
+
+class EmbeddingService:
+    """
+    Batched and cached sentence embeddings.
+
+    Texts are lowercased, deduplicated and encoded in large batches. The
+    unit-length vectors are kept in a bounded LRU cache, so cosine similarity
+    between two groups of texts is a single matrix multiply. Texts found in
+    the precomputed embedding table (see embedding_table) are not encoded.
+    """
+
+    def __init__(self, model, model_name, batch_size=DEFAULT_BATCH_SIZE,
+                 cache_size=DEFAULT_CACHE_SIZE, cache_dir=None, model_loader=None, table_loader=None,
+                 backend=SENTENCE_BACKEND):
+        self._model = model
+        self._model_loader = model_loader
+        self._table = None
+        self._table_loader = table_loader
+        self.model_name = model_name
+        self.backend = backend
+        self.batch_size = batch_size
+        self.cache_size = cache_size
+        self.cache_dir = cache_dir
+        self._cache = OrderedDict()
+        self._lock = threading.RLock()
+
+        if cache_dir:
+            self.load()
+            atexit.register(self.save)
+
+    @property
+    def model(self):
+        """
+        The encoder, created by `model_loader` on first use if none was given.
+        """
+        if self._model is None:
+            self._model = self._model_loader()
+        return self._model
+
+    @property
+    def table(self):
+        """
+        The precomputed EmbeddingTable, from `table_loader` on first use, or None.
+        """
+        if self._table is None and self._table_loader is not None:
+            self._table = self._table_loader()
+            self._table_loader = None
+        return self._table
+
+    @table.setter
+    def table(self, table):
+        with self._lock:
+            self._table = table
+            self._table_loader = None
+            self._cache.clear()
+
+    @property
+    def cache_path(self):
+        """
+        Location of the on-disk cache, one file per model name and backend.
+        """
+        if not self.cache_dir:
+            return None
+        safe_name = re.sub(r"[^A-Za-z0-9_.-]", "_", f"{self.model_name}_{self.backend}")
+        return os.path.join(self.cache_dir, f"embeddings_{safe_name}.npz")
+
+    def _remember(self, text, vector):
+        self._cache[text] = vector
+        self._cache.move_to_end(text)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _encode_missing(self, texts):
+        """
+        Encode texts that are not cached yet, in batches of `batch_size`.
+        """
+        metrics.observe("embedding.encode_texts", len(texts))
+        with metrics.timer("embedding.model_encode"):
+            vectors = self.model.encode(
+                texts,
+                batch_size=self.batch_size,
+                convert_to_numpy=True,
+                show_progress_bar=False,
+            )
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def _lookup_missing(self, texts):
+        """
+        Vectors of texts that are not cached yet: from the table, else encoded.
+        """
+        table = self.table
+        vectors = table.lookup(texts) if table is not None else {}
+        unknown = [text for text in texts if text not in vectors]
+        metrics.cache("embedding_table", hits=len(vectors), misses=len(unknown))
+        if unknown:
+            vectors.update(zip(unknown, self._encode_missing(unknown)))
+        return vectors
+
+    def encode(self, texts):
+        """
+        Return a (len(texts), dim) matrix of normalized embeddings.
+        """
+        keys = [text.lower() for text in texts]
+
+        with self._lock:
+            fresh = {}
+            missing = [key for key in dict.fromkeys(keys) if key not in self._cache]
+            metrics.cache("embeddings", hits=len(keys) - len(missing), misses=len(missing))
+            if missing:
+                fresh = self._lookup_missing(missing)
+                for key, vector in fresh.items():
+                    self._remember(key, vector)
+
+            rows = []
+            for key in keys:
+                # More new texts than the cache holds may already be evicted again
+                vector = self._cache.get(key)
+                if vector is None:
+                    vector = fresh[key]
+                else:
+                    self._cache.move_to_end(key)
+                rows.append(vector)
+
+        if not rows:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.vstack(rows)
+
+    def similarity_matrix(self, left, right):
+        """
+        Cosine similarity of every text in `left` against every text in `right`.
+        """
+        left, right = list(left), list(right)
+        if not left or not right:
+            return np.zeros((len(left), len(right)), dtype=np.float32)
+
+        # Encode both sides in one batch so shared strings are encoded once
+        vectors = self.encode(left + right)
+        # einsum (unlike BLAS matmul) sums each dot product in the same order
+        # whatever the matrix shape, so a pair scores identically alone or in a grid
+        return np.einsum('ij,kj->ik', vectors[:len(left)], vectors[len(left):])
+
+    def similarity(self, text_a, text_b):
+        """
+        Cosine similarity between two texts.
+        """
+        return float(self.similarity_matrix([text_a], [text_b])[0, 0])
+
+    def clear(self):
+        """
+        Forget all cached vectors (the on-disk cache is left untouched).
+        """
+        with self._lock:
+            self._cache.clear()
+
+    def load(self):
+        """
+        Load previously saved vectors for this model and backend, if any.
+        """
+        path = self.cache_path
+        if not path or not os.path.exists(path):
+            return
+
+        with np.load(path, allow_pickle=False) as stored:
+            # Vectors of another backend (or of an unknown one) are encoded again
+            if "backend" not in stored or str(stored["backend"]) != self.backend:
+                return
+            texts = stored["texts"].tolist()
+            vectors = stored["vectors"]
+
+        with self._lock:
+            for text, vector in zip(texts[-self.cache_size:], vectors[-self.cache_size:]):
+                self._remember(text, vector)
+
+    def save(self):
+        """
+        Write the cached vectors to disk, most recently used last.
+        """
+        path = self.cache_path
+        if not path:
+            return
+
+        with self._lock:
+            if not self._cache:
+                return
+            texts = np.array(list(self._cache.keys()))
+            vectors = np.vstack(list(self._cache.values()))
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = path + ".tmp.npz"
+        np.savez(tmp_path, texts=texts, vectors=vectors, backend=np.array(self.backend))
+        os.replace(tmp_path, path)
@@ -0,0 +1,215 @@
+import argparse
+import json
+import os
+import threading
+from collections import Counter
+
+import numpy as np
+
+from model_registry import SENTENCE_BACKEND, SENTENCE_MODEL_NAME
+
+# Prebuilt embeddings of the flavor vocabulary and frequent user keywords
+EMBEDDING_TABLE_PATH = os.environ.get(
+    "EMBEDDING_TABLE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "flavor_embeddings"),
+)
+
+TABLE_DTYPES = ("int8", "float16")
+
+# Most frequent user keywords added to the table by default
+DEFAULT_KEYWORD_COUNT = 50000
+
+
+def quantize(vectors, dtype):
+    """
+    Quantize unit-length float32 vectors, returning (values, per-row scales).
+
+    int8 uses a symmetric scale per row (max |value| maps to 127); float16
+    is a plain cast with unit scales.
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if dtype == "float16":
+        return vectors.astype(np.float16), np.ones(len(vectors), dtype=np.float32)
+
+    scales = np.abs(vectors).max(axis=1) / 127
+    scales[scales == 0] = 1.0
+    values = np.round(vectors / scales[:, None]).astype(np.int8)
+    return values, scales.astype(np.float32)
+
+
+def dequantize(values, scales):
+    """
+    Unit-length float32 vectors back from quantized values.
+    """
+    vectors = values.astype(np.float32) * scales[:, None]
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class EmbeddingTable:
+    """
+    Read-only text -> embedding table stored as a quantized, memory-mapped matrix.
+
+    The directory holds `vectors.npy` (int8 or float16), `scales.npy` and
+    `terms.json`. Vectors are only paged in when looked up, and are
+    dequantized and renormalized on the way out. `backend` is the
+    SENTENCE_BACKEND the vectors were encoded with.
+    """
+
+    def __init__(self, terms, values, scales, model_name, backend=SENTENCE_BACKEND):
+        self.terms = list(terms)
+        self.values = values
+        self.scales = scales
+        self.model_name = model_name
+        self.backend = backend
+        self._rows = {term: row for row, term in enumerate(self.terms)}
+
+    def __contains__(self, text):
+        return text in self._rows
+
+    def __len__(self):
+        return len(self.terms)
+
+    @property
+    def dtype(self):
+        return self.values.dtype.name
+
+    def lookup(self, texts):
+        """
+        Vectors of the texts that are in the table, as {text: float32 vector}.
+        """
+        found = [text for text in dict.fromkeys(texts) if text in self._rows]
+        if not found:
+            return {}
+        rows = np.array([self._rows[text] for text in found])
+        return dict(zip(found, dequantize(self.values[rows], self.scales[rows])))
+
+    @classmethod
+    def build(cls, terms, encode, model_name, dtype="int8", backend=SENTENCE_BACKEND):
+        """
+        Encode `terms` (lowercased, deduplicated) with `encode` and quantize them.
+        """
+        terms = list(dict.fromkeys(term.lower() for term in terms))
+        values, scales = quantize(encode(terms), dtype)
+        return cls(terms, values, scales, model_name, backend)
+
+    @classmethod
+    def load(cls, path=EMBEDDING_TABLE_PATH):
+        """
+        Open a table written by save(), memory-mapping the vectors.
+        """
+        with open(os.path.join(path, "terms.json"), encoding="utf-8") as file:
+            stored = json.load(file)
+        values = np.load(os.path.join(path, "vectors.npy"), mmap_mode="r")
+        scales = np.load(os.path.join(path, "scales.npy"), mmap_mode="r")
+        if not len(stored["terms"]) == len(values) == len(scales):
+            raise ValueError(f"Embedding table at {path} is incomplete; rebuild it")
+        # Tables from before the backend was recorded match no backend
+        return cls(stored["terms"], values, scales, stored["model_name"], stored.get("backend"))
+
+    def save(self, path=EMBEDDING_TABLE_PATH):
+        """
+        Write the table to the `path` directory.
+        """
+        os.makedirs(path, exist_ok=True)
+        # Arrays are written to new files first: the current ones may be memory-mapped
+        arrays = {"vectors": self.values, "scales": self.scales}
+        for name, array in arrays.items():
+            np.save(os.path.join(path, f"{name}.tmp.npy"), np.ascontiguousarray(array))
+
+        # The old terms must not be paired with the new arrays if this stops halfway
+        terms_path = os.path.join(path, "terms.json")
+        if os.path.exists(terms_path):
+            os.remove(terms_path)
+        for name in arrays:
+            os.replace(os.path.join(path, f"{name}.tmp.npy"), os.path.join(path, f"{name}.npy"))
+
+        # Written last: a table without its terms file is never loaded
+        tmp_path = os.path.join(path, "terms.json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump({"version": 1, "model_name": self.model_name, "backend": self.backend, "terms": self.terms}, file)
+        os.replace(tmp_path, terms_path)
+
+
+_table = None
+_table_loaded = False
+_table_lock = threading.Lock()
+
+
+def get_embedding_table(model_name=SENTENCE_MODEL_NAME, backend=SENTENCE_BACKEND):
+    """
+    Process-wide table from EMBEDDING_TABLE_PATH, or None if not built for `model_name` on `backend`.
+    """
+    global _table, _table_loaded
+    if not _table_loaded:
+        with _table_lock:
+            if not _table_loaded:
+                if os.path.exists(os.path.join(EMBEDDING_TABLE_PATH, "terms.json")):
+                    _table = EmbeddingTable.load()
+                _table_loaded = True
+    if _table is None or _table.model_name != model_name or _table.backend != backend:
+        return None
+    return _table
+
+
+def flavor_vocabulary(flavor_lists=()):
+    """
+    The common flavors, flavors found in `flavor_lists` and all their synonyms.
+    """
+    from pdf_processor import COMMON_FLAVORS
+    from synonym_index import expand_flavor_tuple
+
+    flavors = list(COMMON_FLAVORS)
+    for flavor_list in flavor_lists:
+        flavors.extend(flavor.strip() for flavor in flavor_list.split(", "))
+    flavors = tuple(dict.fromkeys(flavors))
+    return list(flavors) + sorted(expand_flavor_tuple(flavors) - set(flavors))
+
+
+def frequent_keywords(texts, count=DEFAULT_KEYWORD_COUNT, weights=None):
+    """
+    The `count` most frequent keywords of user descriptions.
+
+    `weights` gives how often each text occurs (once each by default).
+    """
+    from keyword_extractor import extract_keywords_batch
+
+    counts = Counter()
+    for keywords, weight in zip(extract_keywords_batch(texts), weights or [1] * len(texts)):
+        for keyword in keywords:
+            counts[keyword] += weight
+    return [keyword for keyword, _ in counts.most_common(count)]
+
+
+def main():
+    from columnar_store import read_table
+    from model_registry import get_sentence_model
+    from embedding_service import EmbeddingService
+
+    parser = argparse.ArgumentParser(description="Build the quantized flavor and keyword embedding table.")
+    parser.add_argument("--csv", nargs="*", default=[],
+                        help="datasets whose 'flavors' and 'user_flavor' columns add to the vocabulary")
+    parser.add_argument("--keywords", type=int, default=DEFAULT_KEYWORD_COUNT, help="most frequent user keywords kept")
+    parser.add_argument("--dtype", choices=TABLE_DTYPES, default="int8")
+    parser.add_argument("--output", default=EMBEDDING_TABLE_PATH)
+    args = parser.parse_args()
+
+    flavor_lists, text_counts = [], Counter()
+    for csv_path in args.csv:
+        data = read_table(csv_path, columns=['flavors', 'user_flavor'])
+        flavor_lists.extend(data['flavors'].dropna().unique())
+        text_counts.update(data['user_flavor'].dropna().value_counts().to_dict())
+
+    texts = list(text_counts)
+    terms = flavor_vocabulary(flavor_lists) + frequent_keywords(texts, args.keywords, [text_counts[t] for t in texts])
+
+    # Encode with the live model only, never with an existing table
+    service = EmbeddingService(None, SENTENCE_MODEL_NAME, cache_size=len(terms), model_loader=get_sentence_model)
+    table = EmbeddingTable.build(terms, service.encode, SENTENCE_MODEL_NAME, args.dtype)
+    table.save(args.output)
+    print(f"Stored {len(table)} {table.dtype} embeddings in {args.output}")
+
+
+if __name__ == "__main__":
+    main()
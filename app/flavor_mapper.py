@@ -1,25 +1,184 @@
+import hashlib
+import json
+import os
+
+import numpy as np
 import pandas as pd
-from rapidfuzz import fuzz
+from rapidfuzz import fuzz, process
+
+from flavor_sets import FlavorVocabulary
+from instrumentation import metrics
+
+# Ingredients scored against the flavor keywords per cdist call
+INGREDIENT_BLOCK_SIZE = 50000
+
+
+def ingredient_cache_path(cache_dir, flavor_keywords):
+    """
+    Cache file for a given list of flavor keywords.
+    """
+    fingerprint = hashlib.sha1("\n".join(flavor_keywords).encode("utf-8")).hexdigest()[:12]
+    return os.path.join(cache_dir, f"ingredient_flavors_{fingerprint}.json")
+
+
+def load_ingredient_cache(cache_path):
+    """
+    Load ingredient -> matched flavors saved by a previous run.
+    """
+    if not cache_path or not os.path.exists(cache_path):
+        return {}
+    with open(cache_path) as file:
+        return {ingredient: tuple(flavors) for ingredient, flavors in json.load(file).items()}
+
+
+def save_ingredient_cache(cache_path, cache):
+    """
+    Write ingredient -> matched flavors atomically.
+    """
+    os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+    tmp_path = cache_path + ".tmp"
+    with open(tmp_path, "w") as file:
+        json.dump(cache, file)
+    os.replace(tmp_path, cache_path)
+
+
+@metrics.timed()
+def match_ingredients(ingredients, flavor_keywords, workers=-1):
+    """
+    Map each ingredient to the flavor keywords it fuzzily matches (> 80).
+
+    The ingredient x flavor partial_ratio matrix is computed with
+    rapidfuzz.process.cdist, in blocks and on `workers` threads.
+    """
+    lowered_flavors = [flavor.lower() for flavor in flavor_keywords]
+    matches = {}
+
+    for start in range(0, len(ingredients), INGREDIENT_BLOCK_SIZE):
+        block = ingredients[start:start + INGREDIENT_BLOCK_SIZE]
+        # float64 so scores just above 80 are not rounded down to it
+        scores = process.cdist(
+            [ingredient.lower() for ingredient in block],
+            lowered_flavors,
+            scorer=fuzz.partial_ratio,
+            score_cutoff=80,
+            dtype=np.float64,
+            workers=workers,
+        )
+        for ingredient, row in zip(block, scores > 80):
+            matches[ingredient] = tuple(flavor_keywords[i] for i in np.flatnonzero(row))
+
+    return matches
+
+
+@metrics.timed()
+def map_flavors(dish_names, ingredients, flavor_keywords, workers=-1, cache=None, cache_dir=None):
+    """
+    Predict the flavors of each dish from its comma-separated ingredients.
 
+    Each distinct ingredient is matched once; results are kept in `cache`
+    (ingredient -> flavors) and, with `cache_dir`, reused across runs.
+    Predicted flavors are listed in `flavor_keywords` order. Each dish's
+    flavors are collected as a bitmask over the flavor keywords.
+    """
+    flavor_keywords = list(dict.fromkeys(flavor_keywords))
+    if cache is None:
+        cache = {}
 
-def map_flavors(dish_names, ingredients, flavor_keywords):
+    cache_path = ingredient_cache_path(cache_dir, flavor_keywords) if cache_dir else None
+    if cache_path:
+        cache.update(load_ingredient_cache(cache_path))
+
+    ingredient_lists = [ingredient_list.split(", ") for ingredient_list in ingredients]
+
+    # Match only ingredients that have not been seen before
+    missing = [
+        ingredient
+        for ingredient in dict.fromkeys(i for ingredient_list in ingredient_lists for i in ingredient_list)
+        if ingredient not in cache
+    ]
+    metrics.cache("ingredient_flavors", hits=sum(map(len, ingredient_lists)) - len(missing), misses=len(missing))
+    if missing:
+        cache.update(match_ingredients(missing, flavor_keywords, workers))
+        if cache_path:
+            save_ingredient_cache(cache_path, cache)
+
+    # Flavor IDs follow flavor_keywords, so decoding a mask keeps that order
+    vocabulary = FlavorVocabulary(flavor_keywords)
+    ingredient_masks = {}
     predictions = []
 
-    for dish, ingredient_list in zip(dish_names, ingredients):
-        matched_flavors = set()
+    for ingredient_list in ingredient_lists:
+        mask = 0
+        for ingredient in ingredient_list:
+            ingredient_mask = ingredient_masks.get(ingredient)
+            if ingredient_mask is None:
+                ingredient_mask = ingredient_masks[ingredient] = vocabulary.mask(cache[ingredient])
+            mask |= ingredient_mask
+        predictions.append(vocabulary.decode(mask) if mask else "unknown")
+
+    return pd.DataFrame({"dish_name": list(dish_names), "predicted_flavors": predictions})
+
+
+def iter_mapped_flavors(chunks, flavor_keywords, workers=-1, cache_dir=None):
+    """
+    map_flavors over (dish_names, ingredients) chunks, yielding one DataFrame per chunk.
+
+    The ingredient cache is shared by every chunk, so each distinct
+    ingredient is matched once per corpus; with `cache_dir` it is loaded
+    once and saved when the chunks are done (or mapping stops early).
+    """
+    flavor_keywords = list(dict.fromkeys(flavor_keywords))
+    cache_path = ingredient_cache_path(cache_dir, flavor_keywords) if cache_dir else None
+    cache = load_ingredient_cache(cache_path)
+    known = len(cache)
+    try:
+        for dish_names, ingredients in chunks:
+            yield map_flavors(dish_names, ingredients, flavor_keywords, workers, cache=cache)
+    finally:
+        if cache_path and len(cache) > known:
+            save_ingredient_cache(cache_path, cache)
+
+
+def map_corpus_flavors(dataset_paths, flavor_keywords, output_csv_path, chunksize=None, workers=-1, cache_dir=None):
+    """
+    Map the recipes of one or more (possibly compressed) files to a flavor database CSV, chunk by chunk.
+
+    Returns the number of dishes written.
+    """
+    from data_loader import DEFAULT_CHUNKSIZE, iter_ingredient_chunks
+    from streaming import append_chunk
+
+    chunks = iter_ingredient_chunks(dataset_paths, chunksize or DEFAULT_CHUNKSIZE)
+    if os.path.exists(output_csv_path):
+        os.remove(output_csv_path)
+
+    dishes = 0
+    for predictions in iter_mapped_flavors(chunks, flavor_keywords, workers, cache_dir):
+        with metrics.timer("io.append_chunk"):
+            append_chunk(output_csv_path, predictions, header=dishes == 0)
+        dishes += len(predictions)
+    return dishes
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Predict dish flavors from recipe ingredients, chunk by chunk.")
+    parser.add_argument("recipes", nargs="+", help="recipe CSVs (optionally compressed) with Title and Ingredients")
+    parser.add_argument("--output", required=True, help="flavor database CSV to write")
+    parser.add_argument("--chunksize", type=int, default=None, help="recipes read at a time")
+    parser.add_argument("--articles", help="extract the flavor keywords from the PDFs in this directory")
+    parser.add_argument("--workers", type=int, default=-1, help="cdist threads (-1: all cores)")
+    parser.add_argument("--cache-dir", help="reuse ingredient matches across runs")
+    args = parser.parse_args()
 
-        for ingredient in ingredient_list.split(", "):
-            for flavor in flavor_keywords:
-                # Use fuzzy matching with a threshold (e.g., 80% similarity)
-                if fuzz.partial_ratio(ingredient.lower(), flavor.lower()) > 80:
-                    matched_flavors.add(flavor)
+    from pdf_processor import COMMON_FLAVORS, extract_flavors
 
-        if not matched_flavors:
-            matched_flavors.add("unknown")
+    flavor_keywords = extract_flavors(args.articles) if args.articles else COMMON_FLAVORS
+    dishes = map_corpus_flavors(args.recipes, flavor_keywords, args.output, args.chunksize, args.workers,
+                                args.cache_dir)
+    print(f"{dishes} dishes -> {args.output}")
 
-        predictions.append({
-            "dish_name": dish,
-            "predicted_flavors": ", ".join(matched_flavors)
-        })
 
-    return pd.DataFrame(predictions)
+if __name__ == "__main__":
+    main()
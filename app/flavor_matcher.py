@@ -0,0 +1,75 @@
+from collections import Counter, deque
+
+
+class FlavorMatcher:
+    """
+    Find many flavor terms in a text in a single pass (Aho-Corasick automaton).
+
+    Matching is case-insensitive and only counts whole words, so "hot" is
+    found in "too hot!" but not in "shot". Underscores in WordNet lemma names
+    match spaces ("hot_and_sour" matches "hot and sour").
+    """
+
+    def __init__(self, terms):
+        self.terms = list(dict.fromkeys(terms))
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+
+        for term_id, term in enumerate(self.terms):
+            self._add(term.lower().replace("_", " "), term_id)
+        self._link()
+
+    def _add(self, pattern, term_id):
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+        self._output[state].append((term_id, len(pattern)))
+
+    def _link(self):
+        """
+        Compute failure links breadth first and merge outputs along them.
+        """
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                if self._fail[next_state] == next_state:
+                    self._fail[next_state] = 0
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def count(self, text):
+        """
+        Count whole-word occurrences of every term in `text`.
+        """
+        text = text.lower()
+        counts = Counter()
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+
+        for end, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+
+            for term_id, length in output[state]:
+                start = end - length + 1
+                if start > 0 and text[start - 1].isalnum():
+                    continue
+                if end + 1 < len(text) and text[end + 1].isalnum():
+                    continue
+                counts[self.terms[term_id]] += 1
+
+        return counts
@@ -0,0 +1,164 @@
+import numpy as np
+import pandas as pd
+
+from columnar_store import FLAVOR_SEPARATOR
+
+# Bits per word of a flavor mask column
+WORD_BITS = 64
+
+
+class FlavorVocabulary:
+    """
+    Flavor <-> integer ID mapping with flavor sets as bitmasks.
+
+    A set of flavors is an int with bit `id` set for each flavor, so
+    membership, union and intersection are bitwise operations. Columns of
+    sets are stored as (rows, words) uint64 arrays. Flavors get IDs in the
+    order they are first seen, and decoding lists them in that order.
+    """
+
+    def __init__(self, flavors=()):
+        self.flavors = []
+        self.ids = {}
+        self._masks = {}
+        self._names = {}
+        for flavor in flavors:
+            self.add(flavor)
+
+    def __len__(self):
+        return len(self.flavors)
+
+    def __contains__(self, flavor):
+        return flavor in self.ids
+
+    @property
+    def words(self):
+        """
+        uint64 words needed per row for the current vocabulary.
+        """
+        return max(1, -(-len(self.flavors) // WORD_BITS))
+
+    def add(self, flavor):
+        """
+        ID of a flavor, assigning the next one if it is new.
+        """
+        flavor_id = self.ids.get(flavor)
+        if flavor_id is None:
+            flavor_id = self.ids[flavor] = len(self.flavors)
+            self.flavors.append(flavor)
+        return flavor_id
+
+    def mask(self, flavors):
+        """
+        Bitmask of an iterable of flavors, adding new ones to the vocabulary.
+        """
+        mask = 0
+        for flavor in flavors:
+            mask |= 1 << self.add(flavor)
+        return mask
+
+    def parse(self, flavor_list):
+        """
+        Bitmask of a comma-joined flavor list such as a predicted_flavors value.
+        """
+        ids = self.ids
+        mask = 0
+        for flavor in flavor_list.split(FLAVOR_SEPARATOR):
+            flavor = flavor.strip()
+            if flavor:
+                flavor_id = ids.get(flavor)
+                mask |= 1 << (self.add(flavor) if flavor_id is None else flavor_id)
+        return mask
+
+    def encode(self, flavor_list):
+        """
+        parse(), memoized per flavor list.
+        """
+        mask = self._masks.get(flavor_list)
+        if mask is None:
+            mask = self._masks[flavor_list] = self.parse(flavor_list)
+        return mask
+
+    def ids_in(self, mask):
+        """
+        IDs of the flavors in a bitmask, in increasing order.
+        """
+        ids = []
+        while mask:
+            low_bit = mask & -mask
+            ids.append(low_bit.bit_length() - 1)
+            mask ^= low_bit
+        return ids
+
+    def flavors_of(self, mask):
+        """
+        Flavors in a bitmask, in ID order.
+        """
+        return [self.flavors[flavor_id] for flavor_id in self.ids_in(mask)]
+
+    def decode(self, mask):
+        """
+        Comma-joined flavors of a bitmask (memoized).
+        """
+        name = self._names.get(mask)
+        if name is None:
+            name = self._names[mask] = FLAVOR_SEPARATOR.join(self.flavors_of(mask))
+        return name
+
+    def to_words(self, masks, words=None):
+        """
+        (len(masks), words) uint64 array of int bitmasks.
+        """
+        words = words or self.words
+        array = np.zeros((len(masks), words), dtype=np.uint64)
+        for word in range(words):
+            shift = word * WORD_BITS
+            array[:, word] = [(mask >> shift) & 0xFFFFFFFFFFFFFFFF for mask in masks]
+        return array
+
+    def encode_column(self, flavor_lists):
+        """
+        uint64 mask array of a column of comma-joined flavor lists; each distinct value is parsed once.
+        """
+        codes, uniques = pd.factorize(pd.Series(flavor_lists), use_na_sentinel=False)
+        masks = [self.parse(value) if isinstance(value, str) else 0 for value in uniques.tolist()]
+        return self.to_words(masks)[codes]
+
+    def words_of(self, flavors):
+        """
+        One-row uint64 mask array of flavors, to combine with mask columns.
+        """
+        return self.to_words([self.mask(flavors)])[0]
+
+
+def pad_words(array, words):
+    """
+    Widen a mask array to `words` columns (the vocabulary may have grown since it was built).
+    """
+    if array.shape[1] >= words:
+        return array
+    return np.hstack([array, np.zeros((len(array), words - array.shape[1]), dtype=np.uint64)])
+
+
+def _aligned(array, words):
+    """
+    A mask array and a one-row mask widened to the same number of words.
+    """
+    width = max(array.shape[1], len(words))
+    return pad_words(array, width), np.concatenate([words, np.zeros(width - len(words), dtype=np.uint64)])
+
+
+def intersects(array, words):
+    """
+    Boolean per row: whether the set shares a flavor with the `words` mask.
+    """
+    array, words = _aligned(array, words)
+    return (array & words).any(axis=1)
+
+
+def contains_all(array, words):
+    """
+    Boolean per row: whether the set holds every flavor of the `words` mask.
+    """
+    array, words = _aligned(array, words)
+    return ((array & words) == words).all(axis=1)
@@ -0,0 +1,312 @@
+import functools
+import os
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+# Set PIPELINE_METRICS=1 to collect metrics from the start of the process
+METRICS_ENV = "PIPELINE_METRICS"
+
+
+class _NullTimer:
+    """
+    Shared no-op context manager returned while metrics are disabled.
+    """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        stack = self.metrics._stack()
+        stack.append(self.name)
+        self.path = ";".join(stack)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self.start
+        stack = self.metrics._stack()
+        stack.pop()
+        self.metrics._record_time(self.name, self.path, elapsed)
+        return False
+
+
+class Metrics:
+    """
+    In-process timers, counters, cache hit/miss counts and value histograms.
+
+    Everything is a no-op while disabled: timer() hands back a shared null
+    context manager and the other methods return after one attribute check.
+    Nested timers also build folded stacks ("outer;inner" -> self time) that
+    flame graph tools read.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._cache_infos = {}
+        self.reset()
+
+    def reset(self):
+        """
+        Forget everything collected so far and restart the run clock.
+        """
+        with self._lock:
+            self.timers = defaultdict(lambda: [0, 0.0, 0.0])  # name -> [calls, seconds, max seconds]
+            self.counters = Counter()
+            self.caches = defaultdict(lambda: [0, 0])  # name -> [hits, misses]
+            self.histograms = defaultdict(Counter)  # name -> value -> count
+            self.folded = Counter()  # stack path -> self seconds
+            self.started = time.perf_counter()
+
+    def _stack(self):
+        # Per thread: the names of the open timers and the time spent in their children
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+            self._local.children = {}
+        return stack
+
+    def _record_time(self, name, path, elapsed):
+        # Self time excludes nested timers, so folded stacks add up to wall time
+        children = self._local.children.pop(path, 0.0)
+        parent = path.rpartition(";")[0]
+        if parent:
+            self._local.children[parent] = self._local.children.get(parent, 0.0) + elapsed
+        with self._lock:
+            timer = self.timers[name]
+            timer[0] += 1
+            timer[1] += elapsed
+            timer[2] = max(timer[2], elapsed)
+            self.folded[path] += elapsed - children
+
+    def timer(self, name):
+        """
+        Context manager timing its block under `name`.
+        """
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, name)
+
+    def timed(self, name=None):
+        """
+        Decorator timing every call of a function.
+        """
+        def decorate(func):
+            label = name or func.__name__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with _Timer(self, label):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def count(self, name, value=1):
+        if self.enabled:
+            with self._lock:
+                self.counters[name] += value
+
+    def cache(self, name, hits=0, misses=0):
+        """
+        Record cache lookups of the `name` cache.
+        """
+        if self.enabled:
+            with self._lock:
+                self.caches[name][0] += hits
+                self.caches[name][1] += misses
+
+    def observe(self, name, value):
+        """
+        Add a value (e.g. a batch size) to the `name` histogram.
+        """
+        if self.enabled:
+            with self._lock:
+                self.histograms[name][value] += 1
+
+    def register_cache_info(self, name, cache_info):
+        """
+        Report a functools.lru_cache's own hit/miss statistics (since process start) as the `name` cache.
+        """
+        self._cache_infos[name] = cache_info
+
+    def cache_stats(self):
+        """
+        {cache: (hits, misses)} including registered lru_caches.
+        """
+        with self._lock:
+            stats = {name: tuple(counts) for name, counts in self.caches.items()}
+        for name, cache_info in self._cache_infos.items():
+            info = cache_info()
+            stats[name] = (info.hits, info.misses)
+        return stats
+
+    def report(self):
+        """
+        Human-readable summary of the run so far.
+        """
+        wall = time.perf_counter() - self.started
+        lines = [f"Run time: {wall:.2f} s", "",
+                 f"{'timer':<32} {'calls':>9} {'total s':>9} {'mean ms':>9} {'max ms':>9} {'% run':>6}"]
+        for name, (calls, seconds, longest) in sorted(self.timers.items(), key=lambda item: -item[1][1]):
+            lines.append(f"{name:<32} {calls:>9} {seconds:>9.3f} {seconds / calls * 1000:>9.3f} "
+                         f"{longest * 1000:>9.2f} {seconds / wall:>6.1%}")
+
+        if self.counters:
+            lines += ["", f"{'counter':<32} {'value':>9}"]
+            lines += [f"{name:<32} {value:>9}" for name, value in sorted(self.counters.items())]
+
+        cache_stats = self.cache_stats()
+        if cache_stats:
+            lines += ["", f"{'cache':<32} {'hits':>9} {'misses':>9} {'hit rate':>9}"]
+            for name, (hits, misses) in sorted(cache_stats.items()):
+                rate = hits / (hits + misses) if hits + misses else 0.0
+                lines.append(f"{name:<32} {hits:>9} {misses:>9} {rate:>9.1%}")
+
+        if self.histograms:
+            lines += ["", f"{'histogram':<32} {'count':>9} {'mean':>9} {'p50':>9} {'p95':>9} {'max':>9}"]
+            for name, values in sorted(self.histograms.items()):
+                count = sum(values.values())
+                mean = sum(value * times for value, times in values.items()) / count
+                lines.append(f"{name:<32} {count:>9} {mean:>9.1f} {_quantile(values, 0.5):>9} "
+                             f"{_quantile(values, 0.95):>9} {max(values):>9}")
+        return "\n".join(lines)
+
+    def write_prometheus(self, path):
+        """
+        Write all metrics in the Prometheus text format (e.g. for node_exporter's textfile collector).
+        """
+        lines = [
+            "# HELP pipeline_timer_seconds_total Time spent in instrumented code.",
+            "# TYPE pipeline_timer_seconds_total counter",
+        ]
+        lines += [f'pipeline_timer_seconds_total{{name="{name}"}} {seconds}'
+                  for name, (_, seconds, _) in sorted(self.timers.items())]
+        lines += ["# HELP pipeline_timer_calls_total Calls of instrumented code.",
+                  "# TYPE pipeline_timer_calls_total counter"]
+        lines += [f'pipeline_timer_calls_total{{name="{name}"}} {calls}'
+                  for name, (calls, _, _) in sorted(self.timers.items())]
+        lines += ["# HELP pipeline_events_total Pipeline event counters.", "# TYPE pipeline_events_total counter"]
+        lines += [f'pipeline_events_total{{name="{name}"}} {value}' for name, value in sorted(self.counters.items())]
+        lines += ["# HELP pipeline_cache_requests_total Cache lookups by result.",
+                  "# TYPE pipeline_cache_requests_total counter"]
+        for name, (hits, misses) in sorted(self.cache_stats().items()):
+            lines.append(f'pipeline_cache_requests_total{{cache="{name}",result="hit"}} {hits}')
+            lines.append(f'pipeline_cache_requests_total{{cache="{name}",result="miss"}} {misses}')
+
+        for name, values in sorted(self.histograms.items()):
+            metric = "pipeline_" + "".join(c if c.isalnum() else "_" for c in name)
+            lines += [f"# TYPE {metric} histogram"]
+            bound = 1
+            while bound < max(values):
+                cumulative = sum(times for value, times in values.items() if value <= bound)
+                lines.append(f'{metric}_bucket{{le="{bound}"}} {cumulative}')
+                bound *= 2
+            count = sum(values.values())
+            lines.append(f'{metric}_bucket{{le="+Inf"}} {count}')
+            lines.append(f"{metric}_sum {sum(value * times for value, times in values.items())}")
+            lines.append(f"{metric}_count {count}")
+
+        _write_atomically(path, "\n".join(lines) + "\n")
+
+    def write_folded(self, path):
+        """
+        Write timer self times as folded stacks (microseconds), for flamegraph.pl, inferno or speedscope.
+        """
+        with self._lock:
+            folded = sorted(self.folded.items())
+        _write_atomically(path, "".join(f"{stack} {round(seconds * 1e6)}\n" for stack, seconds in folded))
+
+
+def _quantile(values, q):
+    """
+    Quantile of a {value: count} histogram.
+    """
+    rank = q * sum(values.values())
+    seen = 0
+    for value in sorted(values):
+        seen += values[value]
+        if seen >= rank:
+            return value
+    return max(values)
+
+
+def _write_atomically(path, text):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as file:
+        file.write(text)
+    os.replace(tmp_path, path)
+
+
+metrics = Metrics(enabled=os.environ.get(METRICS_ENV, "") not in ("", "0"))
+timer = metrics.timer
+timed = metrics.timed
+
+
+@contextmanager
+def instrumented_run(report=True, prometheus_path=None, profile_path=None, folded_path=None):
+    """
+    Collect metrics for the enclosed block and report them at the end.
+
+    `prometheus_path` gets the Prometheus text export, `profile_path` a
+    cProfile dump (for pstats, snakeviz...) and `folded_path` the timers as
+    folded stacks. Metrics stay disabled afterwards unless they were enabled before.
+    """
+    was_enabled = metrics.enabled
+    metrics.reset()
+    metrics.enabled = True
+
+    profiler = None
+    if profile_path:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+    try:
+        yield metrics
+    finally:
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(profile_path)
+        metrics.enabled = was_enabled
+
+        if report:
+            print(metrics.report())
+        if prometheus_path:
+            metrics.write_prometheus(prometheus_path)
+        if folded_path:
+            metrics.write_folded(folded_path)
+
+
+def add_arguments(parser):
+    """
+    Add the --metrics/--prometheus/--profile/--folded options to an argparse parser.
+    """
+    parser.add_argument("--metrics", action="store_true", help="print a timing/counter report at the end")
+    parser.add_argument("--prometheus", metavar="PATH", help="write the metrics in Prometheus text format")
+    parser.add_argument("--profile", metavar="PATH", help="write a cProfile dump")
+    parser.add_argument("--folded", metavar="PATH", help="write timer folded stacks for flame graphs")
+
+
+def run_from_arguments(args):
+    """
+    instrumented_run configured by add_arguments options (a no-op context when none is set).
+    """
+    if not (args.metrics or args.prometheus or args.profile or args.folded):
+        return _NULL_TIMER
+    return instrumented_run(args.metrics, args.prometheus, args.profile, args.folded)
@@ -0,0 +1,100 @@
+import threading
+from collections import OrderedDict
+
+from instrumentation import metrics
+from model_registry import get_nlp
+
+# Parts of speech kept as keywords
+KEYWORD_POS = {"ADJ", "NOUN"}
+
+# Distinct descriptions whose keywords are remembered
+KEYWORD_CACHE_SIZE = 100000
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def normalize_sentence(sentence):
+    """
+    Cache key for a sentence: surrounding and repeated whitespace removed.
+    """
+    return " ".join(sentence.split())
+
+
+def keywords_from_doc(doc):
+    """
+    Key terms (adjectives, nouns) of an already parsed spaCy document.
+    """
+    return tuple(token.text.lower() for token in doc if token.pos_ in KEYWORD_POS)
+
+
+def _lookup(text):
+    with _cache_lock:
+        keywords = _cache.get(text)
+        if keywords is not None:
+            _cache.move_to_end(text)
+        return keywords
+
+
+def _remember(text, keywords):
+    with _cache_lock:
+        _cache[text] = keywords
+        _cache.move_to_end(text)
+        while len(_cache) > KEYWORD_CACHE_SIZE:
+            _cache.popitem(last=False)
+
+
+def clear_keyword_cache():
+    """
+    Forget all cached sentence keywords.
+    """
+    with _cache_lock:
+        _cache.clear()
+
+
+@metrics.timed()
+def extract_keywords(sentence):
+    """
+    Extract key terms (adjectives, nouns) from a sentence using spaCy.
+    """
+    text = normalize_sentence(sentence)
+    keywords = _lookup(text)
+    if keywords is None:
+        metrics.cache("keywords", misses=1)
+        with metrics.timer("spacy.parse"):
+            keywords = keywords_from_doc(get_nlp()(text))
+        _remember(text, keywords)
+    else:
+        metrics.cache("keywords", hits=1)
+    return list(keywords)
+
+
+@metrics.timed()
+def extract_keywords_batch(sentences, batch_size=256, n_process=1):
+    """
+    Extract keywords for many sentences, parsing each distinct one only once.
+
+    Sentences missing from the cache are parsed together with nlp.pipe
+    (optionally in `n_process` processes) and then added to the cache.
+    """
+    normalized = [normalize_sentence(sentence) for sentence in sentences]
+
+    keywords = {}
+    missing = []
+    for text in dict.fromkeys(normalized):
+        cached = _lookup(text)
+        if cached is None:
+            missing.append(text)
+        else:
+            keywords[text] = cached
+
+    metrics.cache("keywords", hits=len(keywords), misses=len(missing))
+    if missing:
+        metrics.observe("spacy.pipe_sentences", len(missing))
+        with metrics.timer("spacy.parse"):
+            docs = get_nlp().pipe(missing, batch_size=batch_size, n_process=n_process)
+            for text, doc in zip(missing, docs):
+                keywords[text] = keywords_from_doc(doc)
+                _remember(text, keywords[text])
+
+    return [list(keywords[text]) for text in normalized]
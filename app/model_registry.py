@@ -0,0 +1,95 @@
+import os
+import threading
+
+SPACY_MODEL_NAME = "en_core_web_sm"
+SENTENCE_MODEL_NAME = 'all-MiniLM-L6-v2'
+
+# Sentence model inference backend ("torch", "onnx" or "onnx-int8", see
+# sentence_backends) and its intra-op thread count (default: the runtime's)
+SENTENCE_BACKEND = os.environ.get("SENTENCE_BACKEND", "torch")
+SENTENCE_THREADS = int(os.environ.get("SENTENCE_THREADS", "0")) or None
+
+# Keyword extraction only needs part-of-speech tags: tok2vec, tagger and the
+# attribute_ruler that maps tags to POS stay, everything else is not loaded
+SPACY_EXCLUDED_COMPONENTS = ["parser", "ner", "lemmatizer", "senter"]
+
+
+class LazySingleton:
+    """
+    Process-wide value created by `loader` on first use, thread-safely.
+    """
+
+    def __init__(self, loader):
+        self._loader = loader
+        self._value = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        return self._loaded
+
+    def get(self):
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    self._value = self._loader()
+                    self._loaded = True
+        return self._value
+
+    def set(self, value):
+        """
+        Replace the value, e.g. with a stub model in benchmarks.
+        """
+        with self._lock:
+            self._value = value
+            self._loaded = True
+
+
+def _load_nlp():
+    import spacy
+    return spacy.load(SPACY_MODEL_NAME, exclude=SPACY_EXCLUDED_COMPONENTS)
+
+
+def _load_sentence_model():
+    from sentence_backends import load_sentence_encoder
+    return load_sentence_encoder(SENTENCE_MODEL_NAME, SENTENCE_BACKEND, SENTENCE_THREADS)
+
+
+def _load_wordnet():
+    import nltk
+    from nltk.corpus import wordnet
+
+    # Only download the corpus if it is not installed yet
+    try:
+        wordnet.ensure_loaded()
+    except LookupError:
+        nltk.download('wordnet')
+        wordnet.ensure_loaded()
+    return wordnet
+
+
+nlp_model = LazySingleton(_load_nlp)
+sentence_model = LazySingleton(_load_sentence_model)
+wordnet_corpus = LazySingleton(_load_wordnet)
+
+
+def get_nlp():
+    """
+    The shared spaCy pipeline, with only the components needed for POS tags.
+    """
+    return nlp_model.get()
+
+
+def get_sentence_model():
+    """
+    The shared sentence transformer model, on the configured backend.
+    """
+    return sentence_model.get()
+
+
+def get_wordnet():
+    """
+    The WordNet corpus reader, downloading the corpus only if missing.
+    """
+    return wordnet_corpus.get()
@@ -1,58 +1,117 @@
 import PyPDF2
+import gzip
+import json
 import os
-from nltk.corpus import wordnet
-import nltk
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from flavor_matcher import FlavorMatcher
+from instrumentation import metrics
+from synonym_index import expand_flavor_tuple, get_synonyms  # Synonym lookups now live in synonym_index
 
-# Ensure required resources are downloaded
-nltk.download('wordnet')
+COMMON_FLAVORS = [
+    "sweet", "sugary", "caramelized", "honeyed",
+    "spicy", "hot", "pungent", "peppery",
+    "savory", "umami", "meaty", "brothy",
+    "sour", "tangy", "tart", "acidic",
+    "bitter", "astringent", "sharp",
+    "salty", "briny", "cured",
+    "fruity", "citrusy", "herbal", "earthy",
+    "nutty", "smoky", "creamy", "buttery"
+]
 
-def get_synonyms(word):
-    """
-    Get synonyms for a word from WordNet.
-    """
-    synonyms = set()
-    for syn in wordnet.synsets(word):
-        for lemma in syn.lemmas():
-            synonyms.add(lemma.name().lower())
-    return synonyms
+# Page text cache file kept in the articles directory
+PDF_TEXT_CACHE_NAME = ".pdf_text_cache.json.gz"
 
+@metrics.timed()
 def expand_flavor_keywords(flavor_keywords):
     """
     Expand flavor keywords with their synonyms.
+
+    Returns a frozenset, looked up in the prebuilt synonym index and memoized
+    per flavor tuple; WordNet is only consulted for flavors missing from it.
     """
-    expanded_keywords = set(flavor_keywords)
-    for flavor in flavor_keywords:
-        expanded_keywords.update(get_synonyms(flavor))
-    return list(expanded_keywords)
+    return expand_flavor_tuple(tuple(flavor_keywords))
 
-def extract_flavors(articles_dir):
+def read_page_texts(pdf_path):
     """
-    Extract flavor-related keywords from PDFs.
+    Extract the text of every page of a PDF.
     """
-    flavor_keywords = set()  # Use a set to avoid duplicates
-    common_flavors = [
-        "sweet", "sugary", "caramelized", "honeyed",
-        "spicy", "hot", "pungent", "peppery",
-        "savory", "umami", "meaty", "brothy",
-        "sour", "tangy", "tart", "acidic",
-        "bitter", "astringent", "sharp",
-        "salty", "briny", "cured",
-        "fruity", "citrusy", "herbal", "earthy",
-        "nutty", "smoky", "creamy", "buttery"
+    with open(pdf_path, 'rb') as file:
+        reader = PyPDF2.PdfReader(file)
+        return [page.extract_text() or "" for page in reader.pages]
+
+def load_text_cache(cache_path):
+    """
+    Load cached page texts, keyed by PDF path.
+    """
+    if not cache_path or not os.path.exists(cache_path):
+        return {}
+    with gzip.open(cache_path, "rt", encoding="utf-8") as file:
+        return json.load(file)
+
+def save_text_cache(cache_path, cache):
+    """
+    Write cached page texts atomically.
+    """
+    tmp_path = cache_path + ".tmp"
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as file:
+        json.dump(cache, file)
+    os.replace(tmp_path, cache_path)
+
+def extract_flavor_counts(articles_dir, workers=None, cache_path=None):
+    """
+    Count flavor keyword hits in each PDF of a directory.
+
+    Page texts are extracted in a process pool and cached by path, mtime and
+    size (in `<articles_dir>/.pdf_text_cache.json.gz` by default), so unchanged
+    files are not re-read. Returns {pdf file name: Counter of flavor hits}.
+    """
+    if cache_path is None:
+        cache_path = os.path.join(articles_dir, PDF_TEXT_CACHE_NAME)
+    cache = load_text_cache(cache_path)
+
+    pdf_files = sorted(name for name in os.listdir(articles_dir) if name.endswith(".pdf"))
+    pdf_paths = {name: os.path.abspath(os.path.join(articles_dir, name)) for name in pdf_files}
+
+    # Only re-extract files that are new or changed since they were cached
+    stats = {name: os.stat(path) for name, path in pdf_paths.items()}
+    stale = [
+        name for name in pdf_files
+        if cache.get(pdf_paths[name], {}).get("mtime_ns") != stats[name].st_mtime_ns
+        or cache[pdf_paths[name]].get("size") != stats[name].st_size
     ]
+    if stale:
+        with ProcessPoolExecutor(workers) as executor:
+            stale_texts = executor.map(read_page_texts, [pdf_paths[name] for name in stale])
+            for name, pages in zip(stale, stale_texts):
+                cache[pdf_paths[name]] = {
+                    "mtime_ns": stats[name].st_mtime_ns,
+                    "size": stats[name].st_size,
+                    "pages": pages,
+                }
+
+    # Forget files that were removed from the directory
+    current_paths = set(pdf_paths.values())
+    removed = [path for path in cache if path not in current_paths]
+    for path in removed:
+        del cache[path]
+    if stale or removed:
+        save_text_cache(cache_path, cache)
 
-    # Expand common flavors with synonyms
-    expanded_flavors = expand_flavor_keywords(common_flavors)
-
-    for pdf_file in os.listdir(articles_dir):
-        if pdf_file.endswith(".pdf"):
-            pdf_path = os.path.join(articles_dir, pdf_file)
-            with open(pdf_path, 'rb') as file:
-                reader = PyPDF2.PdfReader(file)
-                for page_num in range(len(reader.pages)):
-                    page = reader.pages[page_num]
-                    text = page.extract_text()
-                    for flavor in expanded_flavors:
-                        if flavor in text.lower():
-                            flavor_keywords.add(flavor)
-    return list(flavor_keywords)
\ No newline at end of file
+    # Match all expanded flavors in one pass per page
+    matcher = FlavorMatcher(sorted(expand_flavor_keywords(COMMON_FLAVORS)))
+    counts = {}
+    for name in pdf_files:
+        counts[name] = Counter()
+        for text in cache[pdf_paths[name]]["pages"]:
+            counts[name].update(matcher.count(text))
+    return counts
+
+def extract_flavors(articles_dir, workers=None, cache_path=None):
+    """
+    Extract flavor-related keywords from PDFs.
+    """
+    flavor_keywords = set()  # Use a set to avoid duplicates
+    for file_counts in extract_flavor_counts(articles_dir, workers, cache_path).values():
+        flavor_keywords.update(file_counts)
+    return list(flavor_keywords)
@@ -0,0 +1,295 @@
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from columnar_store import file_signature, resolve_path
+from instrumentation import metrics
+from keyword_extractor import normalize_sentence
+from score_store import config_hash
+
+# Results kept in process, and for how long (seconds)
+RESULT_CACHE_SIZE = int(os.environ.get("RESULT_CACHE_SIZE", "10000"))
+RESULT_CACHE_TTL = float(os.environ.get("RESULT_CACHE_TTL", "3600"))
+
+# Optional SQLite file shared by every process serving the same database (unset: in-process only)
+RESULT_CACHE_PATH = os.environ.get("RESULT_CACHE_PATH") or None
+
+
+def result_key(dish_name, description):
+    """
+    Cache key of a (selected dish, description) query.
+
+    Dish names are looked up case-insensitively; descriptions are compared
+    like the keyword cache does, ignoring surrounding and repeated whitespace.
+    """
+    return dish_name.strip().lower(), normalize_sentence(description)
+
+
+def database_version(database_path):
+    """
+    Version of the results for a flavor database: its signature plus the scoring config (threshold, models, tables).
+
+    The signature is that of the file read_table actually loads: the CSV, or
+    its Parquet copy when that is up to date or the only one there is.
+    """
+    from addmatchscore import scoring_config
+
+    return config_hash({**scoring_config(), "flavor_database": file_signature(resolve_path(database_path))})
+
+
+class MemoryTier:
+    """
+    Thread-safe LRU of results, each expiring `ttl` seconds after it was stored.
+    """
+
+    def __init__(self, size=RESULT_CACHE_SIZE, ttl=RESULT_CACHE_TTL):
+        self.size = size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, result = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return result
+
+    def put(self, key, result):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class DiskTier:
+    """
+    SQLite table of results shared between processes, keyed by version and query.
+
+    Results of another version are never returned, nor ones older than `ttl`
+    seconds; prune() deletes both.
+    """
+
+    def __init__(self, path, version, ttl=RESULT_CACHE_TTL):
+        self.path = path
+        self.version = version
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        # Other processes may hold the write lock briefly; wait for it instead of failing
+        self._connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "version TEXT NOT NULL, key BLOB NOT NULL, best_flavor TEXT NOT NULL, match_score REAL NOT NULL, "
+            "edibility TEXT NOT NULL, created REAL NOT NULL, PRIMARY KEY (version, key)) WITHOUT ROWID"
+        )
+        self._connection.commit()
+
+    @staticmethod
+    def _digest(key):
+        return hashlib.blake2b("\x1f".join(key).encode("utf-8"), digest_size=16).digest()
+
+    def get(self, key):
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT best_flavor, match_score, edibility FROM results "
+                "WHERE version = ? AND key = ? AND created >= ?",
+                (self.version, self._digest(key), time.time() - self.ttl),
+            ).fetchone()
+        return None if row is None else tuple(row)
+
+    def put(self, key, result):
+        best_flavor, match_score, edibility = result
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO results (version, key, best_flavor, match_score, edibility, created) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (self.version, self._digest(key), best_flavor, float(match_score), edibility, time.time()),
+            )
+
+    def prune(self):
+        """
+        Delete the results of other versions and expired ones, and return how many were removed.
+        """
+        with self._lock, self._connection:
+            return self._connection.execute(
+                "DELETE FROM results WHERE version != ? OR created < ?", (self.version, time.time() - self.ttl)
+            ).rowcount
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+class ResultCache:
+    """
+    (selected dish, description) -> (best flavor, match score, edibility) cache.
+
+    Lookups go through an in-process TTL/LRU tier, then the optional shared
+    on-disk tier. Concurrent misses of the same key are coalesced: the first
+    caller computes the result and the others wait for it (get_or_compute
+    for threads, get_or_compute_async for asyncio tasks). Everything is
+    keyed on `version` (see database_version), so rebuilding the database or
+    changing the threshold never serves old results.
+    """
+
+    def __init__(self, version, size=RESULT_CACHE_SIZE, ttl=RESULT_CACHE_TTL, path=RESULT_CACHE_PATH):
+        self.version = version
+        self.memory = MemoryTier(size, ttl)
+        self.disk = DiskTier(path, version, ttl) if path else None
+        self._inflight = {}
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_database(cls, database_path, **kwargs):
+        """
+        Cache for the results of a flavor database at its current version.
+        """
+        return cls(database_version(database_path), **kwargs)
+
+    def _memory_get(self, key):
+        result = self.memory.get(key)
+        metrics.cache("result_cache.memory", hits=result is not None, misses=result is None)
+        return result
+
+    def _disk_get(self, key):
+        result = self.disk.get(key)
+        metrics.cache("result_cache.disk", hits=result is not None, misses=result is None)
+        if result is not None:
+            self.memory.put(key, result)
+        return result
+
+    def _disk_put(self, key, result):
+        # A busy or broken shared file only costs a later recomputation
+        try:
+            self.disk.put(key, result)
+        except sqlite3.Error:
+            metrics.count("result_cache.disk_errors")
+
+    def get(self, key):
+        """
+        Cached result of a key, or None.
+        """
+        result = self._memory_get(key)
+        if result is None and self.disk is not None:
+            result = self._disk_get(key)
+        return result
+
+    def put(self, key, result):
+        self.memory.put(key, result)
+        if self.disk is not None:
+            self._disk_put(key, result)
+
+    async def get_async(self, key, executor=None):
+        """
+        get() for asyncio: the shared tier is read in `executor` (default: the loop's), off the event loop.
+        """
+        result = self._memory_get(key)
+        if result is None and self.disk is not None:
+            result = await asyncio.get_running_loop().run_in_executor(executor, self._disk_get, key)
+        return result
+
+    def get_or_compute(self, key, compute):
+        """
+        Cached result of a key, else compute() once however many threads ask for it at the same time.
+        """
+        result = self.get(key)
+        if result is not None:
+            return result
+
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+        if not leader:
+            metrics.count("result_cache.coalesced")
+            return future.result()
+
+        try:
+            result = compute()
+            self.put(key, result)
+            future.set_result(result)
+            return result
+        except BaseException as error:
+            future.set_exception(error)
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+
+    async def get_or_compute_async(self, key, compute, executor=None):
+        """
+        get_or_compute for asyncio: `compute` returns an awaitable, awaited once per key at a time.
+
+        The shared tier is used through `executor`, so a contended SQLite
+        file never blocks the event loop. If the task computing a key is
+        cancelled, its waiters are not: one of them computes it instead.
+        """
+        while True:
+            result = await self.get_async(key, executor)
+            if result is not None:
+                return result
+
+            future = self._pending.get(key)
+            if future is None:
+                break
+            metrics.count("result_cache.coalesced")
+            try:
+                # Shielded so that one cancelled waiter does not cancel the others
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                # Only the computing task was cancelled (this one's own cancellation leaves the future alone)
+                if not future.cancelled():
+                    raise
+
+        future = self._pending[key] = asyncio.get_running_loop().create_future()
+        try:
+            result = await compute()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as error:
+            future.set_exception(error)
+            # Retrieved here so that an unawaited failure is not logged
+            future.exception()
+            raise
+        finally:
+            if self._pending.get(key) is future:
+                del self._pending[key]
+
+        # Waiters get the result before the shared tier is written
+        self.memory.put(key, result)
+        future.set_result(result)
+        if self.disk is not None:
+            await asyncio.get_running_loop().run_in_executor(executor, self._disk_put, key, result)
+        return result
+
+    def clear(self):
+        """
+        Forget the in-process results (the shared tier is kept).
+        """
+        self.memory.clear()
+
+    def close(self):
+        if self.disk is not None:
+            self.disk.close()
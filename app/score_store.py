@@ -0,0 +1,90 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+
+# Match scores of (flavors, user_flavor) pairs kept between runs
+SCORE_STORE_PATH = os.environ.get(
+    "SCORE_STORE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "match_scores.sqlite"),
+)
+
+# Keys per SELECT, below SQLite's bound parameter limit
+LOOKUP_BATCH_SIZE = 900
+
+
+def config_hash(config):
+    """
+    Short stable hash of a JSON-serializable scoring configuration.
+    """
+    return hashlib.sha1(json.dumps(config, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+def pair_key(flavors, user_flavor):
+    """
+    Key of a row's scoring inputs.
+    """
+    return hashlib.blake2b(f"{flavors}\x1f{user_flavor}".encode("utf-8"), digest_size=16).digest()
+
+
+class ScoreStore:
+    """
+    SQLite key-value store of match scores, keyed by scoring config and row inputs.
+
+    Scores computed under another config (threshold, model, ...) are never
+    returned; prune() deletes them.
+    """
+
+    def __init__(self, path, config):
+        self.path = path
+        self.config = config_hash(config)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS scores ("
+            "config TEXT NOT NULL, key BLOB NOT NULL, match_score REAL NOT NULL, "
+            "PRIMARY KEY (config, key)) WITHOUT ROWID"
+        )
+        self._connection.commit()
+
+    def __len__(self):
+        with self._lock:
+            query = "SELECT COUNT(*) FROM scores WHERE config = ?"
+            return self._connection.execute(query, (self.config,)).fetchone()[0]
+
+    def get_many(self, keys):
+        """
+        Stored scores of `keys`, as {key: match_score}.
+        """
+        keys = list(keys)
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), LOOKUP_BATCH_SIZE):
+                batch = keys[start:start + LOOKUP_BATCH_SIZE]
+                query = (f"SELECT key, match_score FROM scores "
+                         f"WHERE config = ? AND key IN ({', '.join('?' * len(batch))})")
+                found.update(self._connection.execute(query, [self.config, *batch]))
+        return found
+
+    def put_many(self, items):
+        """
+        Store (key, match_score) pairs, replacing existing scores.
+        """
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO scores (config, key, match_score) VALUES (?, ?, ?)",
+                ((self.config, key, float(score)) for key, score in items),
+            )
+
+    def prune(self):
+        """
+        Delete the scores of every other config and return how many were removed.
+        """
+        with self._lock, self._connection:
+            return self._connection.execute("DELETE FROM scores WHERE config != ?", (self.config,)).rowcount
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
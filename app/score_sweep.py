@@ -0,0 +1,214 @@
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# Default grid: thresholds, and fuzzy weights (the semantic weight is 1 - fuzzy weight)
+DEFAULT_THRESHOLDS = np.round(np.arange(0.30, 0.951, 0.01), 2)
+DEFAULT_FUZZY_WEIGHTS = np.round(np.arange(0.0, 1.001, 0.1), 2)
+
+# How the scorer combines them today: the best of fuzzy and semantic per keyword/flavor pair
+MAX_COMBINATION = "max"
+
+# Same labels as analytics.EDIBILITY_MAPPING (not imported: analytics loads the plotting libraries)
+EDIBILITY_MAPPING = {'edible': 1, 'potentially spoiled': 0}
+
+COMPONENT_ARRAYS = ("row_pairs", "synonym_hits", "grid_pairs", "fuzzy", "semantic")
+
+
+def merge_components(parts):
+    """
+    Concatenate per-chunk components, offsetting their pair ids.
+    """
+    merged = {name: [] for name in COMPONENT_ARRAYS}
+    offset = 0
+    for part in parts:
+        merged["row_pairs"].append(np.asarray(part["row_pairs"], dtype=np.int64) + offset)
+        merged["grid_pairs"].append(np.asarray(part["grid_pairs"], dtype=np.int64) + offset)
+        merged["synonym_hits"].append(np.asarray(part["synonym_hits"], dtype=bool))
+        merged["fuzzy"].append(np.asarray(part["fuzzy"], dtype=np.float64))
+        merged["semantic"].append(np.asarray(part["semantic"], dtype=np.float32))
+        offset += len(part["synonym_hits"])
+    empty = {"row_pairs": np.int64, "grid_pairs": np.int64, "synonym_hits": bool,
+             "fuzzy": np.float64, "semantic": np.float32}
+    return {name: np.concatenate(arrays) if arrays else np.zeros(0, dtype=empty[name])
+            for name, arrays in merged.items()}
+
+
+def save_components(path, parts, config=None):
+    """
+    Write the component scores collected by score_rows_bulk to an .npz file.
+
+    row_pairs maps each input row (in input order) to its distinct input
+    pair; synonym_hits marks pairs decided by a synonym; every keyword/flavor
+    comparison of the other pairs has a grid_pairs, fuzzy and semantic entry.
+    """
+    components = merge_components(parts)
+    tmp_path = path + ".tmp.npz"
+    np.savez_compressed(tmp_path, config=np.array(json.dumps(config or {})), **components)
+    os.replace(tmp_path, path)
+
+
+def load_components(path):
+    """
+    Components written by save_components, with the comparisons sorted by pair.
+    """
+    with np.load(path) as stored:
+        components = {name: stored[name] for name in COMPONENT_ARRAYS}
+        components["config"] = json.loads(str(stored["config"]))
+    order = np.argsort(components["grid_pairs"], kind="stable")
+    for name in ("grid_pairs", "fuzzy", "semantic"):
+        components[name] = components[name][order]
+    return components
+
+
+def pair_scores(components, fuzzy_weight=None, semantic_weight=None):
+    """
+    Match score of every pair for one combination of the components.
+
+    Without weights the components are combined like the scorer does (their
+    maximum); otherwise as fuzzy_weight * fuzzy + semantic_weight * semantic.
+    """
+    fuzzy, semantic = components["fuzzy"], components["semantic"].astype(np.float64)
+    if fuzzy_weight is None:
+        comparison_scores = np.maximum(fuzzy, semantic)
+    else:
+        comparison_scores = fuzzy_weight * fuzzy + semantic_weight * semantic
+
+    # Best comparison per pair, floored at 0; a synonym hit is a perfect match
+    scores = np.zeros(len(components["synonym_hits"]), dtype=np.float64)
+    grid_pairs = components["grid_pairs"]
+    if len(grid_pairs):
+        starts = np.flatnonzero(np.r_[True, grid_pairs[1:] != grid_pairs[:-1]])
+        scores[grid_pairs[starts]] = np.maximum(np.maximum.reduceat(comparison_scores, starts), 0.0)
+    scores[components["synonym_hits"]] = 1.0
+    return scores
+
+
+def confusion_counts(scores, positives, negatives, thresholds):
+    """
+    (tp, fp, fn, tn) per threshold of `score > threshold` predictions.
+
+    `positives`/`negatives` count the edible/spoiled rows of each pair, so
+    every threshold costs one binary search over the sorted pair scores.
+    """
+    order = np.argsort(scores, kind="stable")
+    below = np.searchsorted(scores[order], thresholds, side="right")
+    positives_below = np.r_[0, np.cumsum(positives[order])][below]
+    negatives_below = np.r_[0, np.cumsum(negatives[order])][below]
+    return (positives.sum() - positives_below, negatives.sum() - negatives_below,
+            positives_below, negatives_below)
+
+
+def sweep_combinations(components, positives, negatives, combinations, thresholds):
+    """
+    Metrics of every (combination, threshold) point; combinations are (name, fuzzy weight, semantic weight).
+    """
+    frames = []
+    for name, fuzzy_weight, semantic_weight in combinations:
+        tp, fp, fn, tn = confusion_counts(
+            pair_scores(components, fuzzy_weight, semantic_weight), positives, negatives, thresholds
+        )
+        frames.append(pd.DataFrame({
+            "combination": name,
+            "fuzzy_weight": np.nan if fuzzy_weight is None else fuzzy_weight,
+            "semantic_weight": np.nan if semantic_weight is None else semantic_weight,
+            "threshold": thresholds,
+            "tp": tp, "fp": fp, "fn": fn, "tn": tn,
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def add_rates(results):
+    """
+    Accuracy, precision, recall and F1 columns from the confusion counts.
+    """
+    counts = results[["tp", "fp", "fn", "tn"]].to_numpy(dtype=np.float64)
+    tp, fp, fn, tn = counts.T
+    with np.errstate(divide="ignore", invalid="ignore"):
+        results["accuracy"] = (tp + tn) / counts.sum(axis=1)
+        results["precision"] = np.nan_to_num(tp / (tp + fp))
+        results["recall"] = np.nan_to_num(tp / (tp + fn))
+        results["f1"] = np.nan_to_num(2 * tp / (2 * tp + fp + fn))
+    return results
+
+
+def label_counts(components, labels):
+    """
+    Edible and spoiled row counts per pair, from 'Edible'/'Potentially Spoiled' labels.
+    """
+    labels = pd.Series(labels).astype("string").str.strip().str.lower().map(EDIBILITY_MAPPING)
+    if labels.isnull().any():
+        raise ValueError("Unexpected values in the label column. Please check the dataset.")
+    if len(labels) != len(components["row_pairs"]):
+        raise ValueError(f"{len(labels)} labels for {len(components['row_pairs'])} scored rows")
+
+    pair_count = len(components["synonym_hits"])
+    edible = labels.to_numpy(dtype=np.float64)
+    positives = np.bincount(components["row_pairs"], weights=edible, minlength=pair_count)
+    negatives = np.bincount(components["row_pairs"], weights=1 - edible, minlength=pair_count)
+    return positives, negatives
+
+
+def weight_combinations(fuzzy_weights=DEFAULT_FUZZY_WEIGHTS, include_max=True):
+    """
+    (name, fuzzy weight, semantic weight) combinations, the current max combination first.
+    """
+    combinations = [(MAX_COMBINATION, None, None)] if include_max else []
+    combinations += [(f"{w:g}*fuzzy+{1 - w:g}*semantic", float(w), float(round(1 - w, 6))) for w in fuzzy_weights]
+    return combinations
+
+
+def run_sweep(components, labels, thresholds=DEFAULT_THRESHOLDS, combinations=None, workers=1):
+    """
+    Metrics for every threshold and weight combination, optionally split over `workers` processes.
+    """
+    combinations = weight_combinations() if combinations is None else combinations
+    thresholds = np.asarray(thresholds, dtype=np.float64)
+    positives, negatives = label_counts(components, labels)
+
+    if workers <= 1 or len(combinations) <= 1:
+        results = sweep_combinations(components, positives, negatives, combinations, thresholds)
+    else:
+        groups = [combinations[i::workers] for i in range(workers) if combinations[i::workers]]
+        with ProcessPoolExecutor(len(groups)) as executor:
+            parts = executor.map(sweep_combinations, *zip(*[
+                (components, positives, negatives, group, thresholds) for group in groups
+            ]))
+            results = pd.concat(list(parts), ignore_index=True)
+    return add_rates(results)
+
+
+def main():
+    from columnar_store import read_table, save_table
+
+    parser = argparse.ArgumentParser(
+        description="Evaluate thresholds and fuzzy/semantic weights over stored component scores."
+    )
+    parser.add_argument("components", help=".npz written by addmatchscore.py --components")
+    parser.add_argument("dataset", help="the scored input dataset, with a label column")
+    parser.add_argument("--label-column", default="edibility")
+    parser.add_argument("--thresholds", type=float, nargs="*", default=list(DEFAULT_THRESHOLDS))
+    parser.add_argument("--fuzzy-weights", type=float, nargs="*", default=list(DEFAULT_FUZZY_WEIGHTS))
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--sort", default="accuracy", choices=["accuracy", "precision", "recall", "f1"])
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--output", help="write every point (CSV or .parquet)")
+    args = parser.parse_args()
+
+    components = load_components(args.components)
+    labels = read_table(args.dataset, columns=[args.label_column])[args.label_column]
+    results = run_sweep(components, labels, args.thresholds, weight_combinations(args.fuzzy_weights), args.workers)
+
+    columns = ["combination", "threshold", "accuracy", "precision", "recall", "f1", "tp", "fp", "fn", "tn"]
+    print(f"{len(results)} points, best by {args.sort}:")
+    print(results.sort_values(args.sort, ascending=False, kind="stable")[columns].head(args.top).to_string(index=False))
+    if args.output:
+        save_table(results, args.output)
+
+
+if __name__ == "__main__":
+    main()
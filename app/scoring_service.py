@@ -0,0 +1,317 @@
+import argparse
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
+
+import app
+from columnar_store import read_table
+from dish_index import DishIndex
+from instrumentation import metrics
+from keyword_extractor import extract_keywords_batch
+from model_registry import get_nlp, get_sentence_model
+from result_cache import RESULT_CACHE_PATH, RESULT_CACHE_SIZE, RESULT_CACHE_TTL, ResultCache, result_key
+from semantic_checker import embedding_service
+from semantic_dish_index import load_semantic_index, merge_matches
+
+# Requests arriving within this window are scored together
+DEFAULT_BATCH_WINDOW = 0.005
+DEFAULT_MAX_BATCH = 64
+
+# Largest number of dishes one search returns
+MAX_SEARCH_LIMIT = 50
+
+
+def score_batch(requests):
+    """
+    Score several (description, predicted_flavors) requests at once.
+
+    Every keyword and flavor of the batch is encoded in a single embedding
+    call; the per-request scoring then only hits the embedding cache. Each
+    request is scored on its own, and its entry in the returned list is either
+    its (best flavor, score, edibility) or the exception it raised, so one bad
+    request does not fail the others.
+    """
+    try:
+        # Parse all descriptions together; compare_flavors then hits the keyword cache
+        texts = []
+        for keywords in extract_keywords_batch([description for description, _ in requests]):
+            texts.extend(keywords)
+        for _, predicted_flavors in requests:
+            if isinstance(predicted_flavors, str):
+                texts.extend(flavor.strip() for flavor in predicted_flavors.split(", "))
+        if texts:
+            embedding_service.encode(list(dict.fromkeys(texts)))
+    except Exception:
+        # Only a warm-up: scoring each request below raises its own error again
+        pass
+
+    results = []
+    for description, predicted_flavors in requests:
+        try:
+            results.append(app.score_description(description, predicted_flavors))
+        except Exception as error:
+            results.append(error)
+    return results
+
+
+class ScoreBatcher:
+    """
+    Collect concurrent score requests into micro-batches run in an executor.
+    """
+
+    def __init__(self, executor, window=DEFAULT_BATCH_WINDOW, max_batch=DEFAULT_MAX_BATCH):
+        self.executor = executor
+        self.window = window
+        self.max_batch = max_batch
+        self.queue = asyncio.Queue()
+        self.batch_sizes = []
+
+    async def score(self, description, predicted_flavors):
+        """
+        Queue one request and wait for its (best flavor, score, edibility).
+        """
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((description, predicted_flavors, future))
+        return await future
+
+    async def run(self):
+        """
+        Score batches forever; requests queue up while a batch is being scored.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.window
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            self.batch_sizes.append(len(batch))
+            metrics.observe("service.batch_size", len(batch))
+            try:
+                results = await loop.run_in_executor(
+                    self.executor, score_batch, [(description, flavors) for description, flavors, _ in batch]
+                )
+            except Exception as error:
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(error)
+            else:
+                for (_, _, future), result in zip(batch, results):
+                    if future.done():
+                        continue
+                    if isinstance(result, Exception):
+                        future.set_exception(result)
+                    else:
+                        future.set_result(result)
+
+
+class ScoringService:
+    """
+    HTTP/1.1 JSON service around app.py's dish search and flavor scoring.
+
+    GET  /dishes/search?q=<name>&limit=5   (limit 1 to MAX_SEARCH_LIMIT)
+    POST /score  {"dish": "<name>", "description": "<taste description>"}
+    GET  /health
+
+    With a `result_cache`, repeated and concurrent identical score requests
+    are answered from it instead of being scored again.
+    """
+
+    def __init__(self, flavor_data, dish_index, threads=4, batch_window=DEFAULT_BATCH_WINDOW,
+                 max_batch=DEFAULT_MAX_BATCH, semantic_index=None, result_cache=None):
+        self.flavor_data = flavor_data
+        self.dish_index = dish_index
+        self.semantic_index = semantic_index
+        self.result_cache = result_cache
+        self.executor = ThreadPoolExecutor(threads)
+        self.batcher = ScoreBatcher(self.executor, batch_window, max_batch)
+
+    async def search(self, query):
+        params = parse_qs(query)
+        dish_name = params.get("q", [""])[0]
+        if not dish_name:
+            return HTTPStatus.BAD_REQUEST, {"error": "missing query parameter 'q'"}
+        try:
+            limit = int(params.get("limit", ["5"])[0])
+        except ValueError:
+            return HTTPStatus.BAD_REQUEST, {"error": "'limit' must be an integer"}
+        if limit < 1:
+            return HTTPStatus.BAD_REQUEST, {"error": "'limit' must be at least 1"}
+        limit = min(limit, MAX_SEARCH_LIMIT)
+
+        loop = asyncio.get_running_loop()
+        matches = await loop.run_in_executor(self.executor, self.search_dishes, dish_name, limit)
+        return HTTPStatus.OK, {"query": dish_name, "dishes": [{"name": name, "score": score} for name, score in matches]}
+
+    def search_dishes(self, dish_name, limit):
+        """
+        Fuzzy name matches, followed by semantic ones when there is a semantic index.
+        """
+        matches = self.dish_index.search(dish_name, limit=limit, score_cutoff=60)
+        if self.semantic_index is not None:
+            matches = merge_matches(matches, self.semantic_index.search(dish_name, limit=limit), limit=limit)
+        return matches
+
+    async def score(self, body):
+        try:
+            request = json.loads(body or b"{}")
+            dish_name = request["dish"]
+            description = request["description"]
+        except (ValueError, KeyError, TypeError):
+            return HTTPStatus.BAD_REQUEST, {"error": "expected JSON with 'dish' and 'description'"}
+        if not isinstance(dish_name, str) or not isinstance(description, str):
+            return HTTPStatus.BAD_REQUEST, {"error": "'dish' and 'description' must be strings"}
+
+        row = self.dish_index.row_for(dish_name)
+        if row is None:
+            suggestions = app.find_similar_dishes(dish_name, self.flavor_data, self.dish_index, self.semantic_index)
+            return HTTPStatus.NOT_FOUND, {"error": f"unknown dish '{dish_name}'", "suggestions": suggestions}
+
+        predicted_flavors = self.flavor_data.iloc[row]["predicted_flavors"]
+        if self.result_cache is None:
+            best_flavor, match_score, edibility = await self.batcher.score(description, predicted_flavors)
+        else:
+            best_flavor, match_score, edibility = await self.result_cache.get_or_compute_async(
+                result_key(dish_name, description), lambda: self.batcher.score(description, predicted_flavors)
+            )
+        return HTTPStatus.OK, {
+            "dish": dish_name,
+            "predicted_flavor": best_flavor,
+            "match_score": match_score,
+            "edibility": edibility,
+        }
+
+    async def route(self, method, target, body):
+        url = urlsplit(target)
+        if url.path == "/health" and method == "GET":
+            return HTTPStatus.OK, {"status": "ok", "batches": len(self.batcher.batch_sizes)}
+        if url.path == "/dishes/search" and method == "GET":
+            return await self.search(url.query)
+        if url.path == "/score" and method == "POST":
+            return await self.score(body)
+        if url.path in ("/health", "/dishes/search", "/score"):
+            return HTTPStatus.METHOD_NOT_ALLOWED, {"error": f"{method} not allowed"}
+        return HTTPStatus.NOT_FOUND, {"error": f"no route for {url.path}"}
+
+    async def read_request(self, reader):
+        """
+        (method, target, headers, body) of the next request, or None once the client is done.
+
+        Raises ValueError for a malformed request line, header or Content-Length.
+        """
+        request_line = await reader.readline()
+        if not request_line.strip():
+            return None
+        parts = request_line.decode("latin-1").split(" ", 2)
+        if len(parts) != 3:
+            raise ValueError("malformed request line")
+        method, target, _ = parts
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        content_length = headers.get("content-length", "0")
+        if not content_length.isdigit():
+            raise ValueError("invalid Content-Length")
+        body = await reader.readexactly(int(content_length))
+        return method, target, headers, body
+
+    @staticmethod
+    async def write_response(writer, status, payload, keep_alive):
+        content = json.dumps(payload).encode("utf-8")
+        writer.write(
+            f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(content)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + content
+        )
+        await writer.drain()
+
+    async def handle_connection(self, reader, writer):
+        """
+        Serve requests on one keep-alive connection.
+        """
+        try:
+            while True:
+                try:
+                    request = await self.read_request(reader)
+                except ValueError as error:
+                    # The rest of the stream cannot be framed, so answer and close
+                    await self.write_response(writer, HTTPStatus.BAD_REQUEST,
+                                              {"error": str(error)}, keep_alive=False)
+                    break
+                if request is None:
+                    break
+                method, target, headers, body = request
+
+                try:
+                    status, payload = await self.route(method, target, body)
+                except Exception as error:
+                    status, payload = HTTPStatus.INTERNAL_SERVER_ERROR, {"error": str(error)}
+
+                keep_alive = headers.get("connection", "").lower() != "close"
+                await self.write_response(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host, port):
+        batcher_task = asyncio.create_task(self.batcher.run())
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        print(f"Serving on http://{host}:{port}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            batcher_task.cancel()
+            self.executor.shutdown(wait=False)
+            if self.result_cache is not None:
+                self.result_cache.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve dish search and flavor scoring over HTTP.")
+    parser.add_argument("--database", default=app.FLAVOR_DATABASE_PATH)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--threads", type=int, default=4, help="executor threads for CPU-bound work")
+    parser.add_argument("--batch-window-ms", type=float, default=DEFAULT_BATCH_WINDOW * 1000)
+    parser.add_argument("--max-batch", type=int, default=DEFAULT_MAX_BATCH)
+    parser.add_argument("--result-cache", default=RESULT_CACHE_PATH,
+                        help="SQLite file of score results shared by every service process")
+    parser.add_argument("--cache-size", type=int, default=RESULT_CACHE_SIZE, help="results kept in process")
+    parser.add_argument("--cache-ttl", type=float, default=RESULT_CACHE_TTL, help="seconds a result is reused")
+    args = parser.parse_args()
+
+    # Load the models, database and index once, before serving
+    get_nlp()
+    get_sentence_model()
+    flavor_data = read_table(args.database)
+    dish_index = DishIndex.for_csv(args.database, flavor_data)
+    semantic_index = load_semantic_index(args.database, flavor_data)
+
+    result_cache = ResultCache.for_database(args.database, size=args.cache_size, ttl=args.cache_ttl,
+                                            path=args.result_cache)
+    service = ScoringService(flavor_data, dish_index, args.threads, args.batch_window_ms / 1000, args.max_batch,
+                             semantic_index, result_cache)
+    asyncio.run(service.serve(args.host, args.port))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,32 @@
-from sentence_transformers import SentenceTransformer, util
+import os
 
-# Load a pre-trained sentence transformer model
-model = SentenceTransformer('all-MiniLM-L6-v2')  # Lightweight and fast
+from embedding_service import EmbeddingService
+from embedding_table import get_embedding_table
+from instrumentation import metrics
+from model_registry import SENTENCE_MODEL_NAME, get_sentence_model
 
+MODEL_NAME = SENTENCE_MODEL_NAME
 
+# Shared batched/cached encoder; the model itself is only loaded on first use,
+# for texts missing from the precomputed embedding table (if one was built).
+# Set EMBEDDING_CACHE_DIR to keep vectors between runs.
+embedding_service = EmbeddingService(
+    None, MODEL_NAME, model_loader=get_sentence_model, cache_dir=os.environ.get("EMBEDDING_CACHE_DIR"),
+    table_loader=get_embedding_table,
+)
+
+
+@metrics.timed()
 def semantic_similarity(user_input, predicted_flavor):
     """
     Calculate semantic similarity between user input and predicted flavor.
     """
-    user_embedding = model.encode(user_input.lower(), convert_to_tensor=True)
-    flavor_embedding = model.encode(predicted_flavor.lower(), convert_to_tensor=True)
+    return embedding_service.similarity(user_input, predicted_flavor)
+
 
-    # Use cosine similarity
-    similarity = util.cos_sim(user_embedding, flavor_embedding).item()
-    return similarity
+@metrics.timed()
+def semantic_similarity_matrix(user_inputs, predicted_flavors):
+    """
+    Calculate semantic similarity of every user input against every predicted flavor.
+    """
+    return embedding_service.similarity_matrix(user_inputs, predicted_flavors)
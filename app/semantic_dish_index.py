@@ -0,0 +1,401 @@
+import argparse
+import json
+import os
+
+import numpy as np
+from rapidfuzz import fuzz
+from rapidfuzz.utils import default_process
+
+from columnar_store import file_signature, resolve_path
+from embedding_service import EmbeddingService
+from embedding_table import dequantize, quantize
+from instrumentation import metrics
+from model_registry import SENTENCE_BACKEND, SENTENCE_MODEL_NAME, get_sentence_model
+
+# "auto" uses the index once built with this module's CLI, "1" also builds
+# it on first use and "0" turns semantic dish search off
+SEMANTIC_DISH_SEARCH = os.environ.get("SEMANTIC_DISH_SEARCH", "auto")
+
+# Inverted lists searched per query, and the nearest names re-ranked with rapidfuzz
+DEFAULT_NPROBE = 16
+ANN_CANDIDATES = 100
+
+# Share of the embedding cosine in the re-ranked score, the rest is rapidfuzz WRatio
+SEMANTIC_WEIGHT = 0.5
+
+# Semantic matches are scored differently from fuzz.ratio, so they get their own cutoff
+SEMANTIC_SCORE_CUTOFF = 50
+
+# Names encoded per model call while building
+ENCODE_BLOCK_SIZE = 10000
+
+# Added names kept after the sorted lists until they are merged in
+MAX_UNSORTED_FRACTION = 0.1
+
+# k-means training: iterations and sampled names per list
+KMEANS_ITERATIONS = 10
+KMEANS_SAMPLE_PER_LIST = 64
+
+# Vectors compared with the centroids per matrix multiply
+ASSIGN_BLOCK_SIZE = 65536
+
+# Dish names are encoded apart from the scorer's keywords, which they would evict
+name_embeddings = EmbeddingService(None, SENTENCE_MODEL_NAME, cache_size=ENCODE_BLOCK_SIZE,
+                                   model_loader=get_sentence_model)
+
+
+def semantic_index_path(csv_path):
+    """
+    Directory of the semantic index kept next to a flavor database.
+    """
+    return csv_path + ".semindex"
+
+
+def encode_names(names, encode):
+    """
+    int8 embeddings (values, scales) of names, encoded in blocks.
+    """
+    values, scales = [], []
+    for start in range(0, len(names), ENCODE_BLOCK_SIZE):
+        block_values, block_scales = quantize(encode(names[start:start + ENCODE_BLOCK_SIZE]), "int8")
+        values.append(block_values)
+        scales.append(block_scales)
+    if not values:
+        return np.zeros((0, 0), dtype=np.int8), np.zeros(0, dtype=np.float32)
+    return np.concatenate(values), np.concatenate(scales)
+
+
+def nearest_lists(vectors, centroids):
+    """
+    Index of the most similar centroid of each unit vector.
+    """
+    return np.concatenate([
+        np.argmax(vectors[start:start + ASSIGN_BLOCK_SIZE] @ centroids.T, axis=1)
+        for start in range(0, len(vectors), ASSIGN_BLOCK_SIZE)
+    ] or [np.zeros(0, dtype=np.int64)]).astype(np.int32)
+
+
+def assign_lists(values, scales, centroids):
+    """
+    Inverted list of each int8 embedding, dequantized block by block.
+    """
+    return np.concatenate([
+        nearest_lists(dequantize(np.asarray(values[start:start + ASSIGN_BLOCK_SIZE]),
+                                 np.asarray(scales[start:start + ASSIGN_BLOCK_SIZE])), centroids)
+        for start in range(0, len(values), ASSIGN_BLOCK_SIZE)
+    ] or [np.zeros(0, dtype=np.int32)])
+
+
+def train_centroids(values, scales, list_count, seed=0):
+    """
+    Spherical k-means centroids of a sample of the int8 embeddings.
+    """
+    rng = np.random.default_rng(seed)
+    sample_size = min(len(values), list_count * KMEANS_SAMPLE_PER_LIST)
+    sample_ids = np.sort(rng.choice(len(values), sample_size, replace=False))
+    sample = dequantize(np.asarray(values[sample_ids]), np.asarray(scales[sample_ids]))
+
+    centroids = sample[rng.choice(sample_size, list_count, replace=False)]
+    for _ in range(KMEANS_ITERATIONS):
+        assignment = nearest_lists(sample, centroids)
+        counts = np.bincount(assignment, minlength=list_count)
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        nonempty = counts > 0
+
+        sums = np.empty_like(centroids)
+        sums[nonempty] = np.add.reduceat(sample[np.argsort(assignment, kind="stable")], starts[nonempty], axis=0)
+        # Empty lists restart from a random name
+        sums[~nonempty] = sample[rng.choice(sample_size, int((~nonempty).sum()))]
+        centroids = sums / np.linalg.norm(sums, axis=1, keepdims=True)
+    return centroids.astype(np.float32)
+
+
+def merge_matches(*match_lists, limit=5):
+    """
+    Up to `limit` (name, score) pairs of several searches, each name once, in list order.
+
+    The searches score on different scales (fuzz.ratio for DishIndex, the
+    blended cosine/WRatio score here), so their scores are never compared:
+    each list keeps its own ranking and later lists only fill the places
+    left by earlier ones.
+    """
+    merged = {}
+    for matches in match_lists:
+        for name, score in matches:
+            merged.setdefault(name, score)
+    return list(merged.items())[:limit]
+
+
+class SemanticDishIndex:
+    """
+    Approximate nearest-neighbor search over dish name embeddings (IVF).
+
+    Names are embedded once and stored as int8 vectors, grouped into
+    inverted lists around k-means centroids. A query only scores the names
+    of its `nprobe` nearest lists; the closest ones are then re-ranked with
+    rapidfuzz, so "spag bol" can find "spaghetti bolognese". Names added
+    later are appended (with their nearest list) after the sorted lists and
+    merged in once they grow past MAX_UNSORTED_FRACTION.
+    """
+
+    def __init__(self, names, values, scales, lists, centroids, sorted_count, model_name,
+                 active=None, trained_count=None, source_signature=None, backend=SENTENCE_BACKEND):
+        self.names = list(names)
+        self.values = values
+        self.scales = scales
+        self.lists = lists
+        self.centroids = centroids
+        self.sorted_count = sorted_count
+        self.model_name = model_name
+        self.active = np.ones(len(self.names), dtype=bool) if active is None else np.asarray(active, dtype=bool)
+        self.trained_count = len(self.names) if trained_count is None else trained_count
+        self.source_signature = source_signature
+        self.backend = backend
+
+        self.positions = {name: position for position, name in enumerate(self.names)}
+        self.offsets = np.searchsorted(lists[:sorted_count], np.arange(len(centroids) + 1))
+
+    def __len__(self):
+        return int(self.active.sum())
+
+    @classmethod
+    def build(cls, names, encode=None, model_name=SENTENCE_MODEL_NAME, source_signature=None,
+              backend=SENTENCE_BACKEND):
+        """
+        Embed the distinct (lowercased) names and cluster them into about sqrt(n) lists.
+        """
+        encode = encode or name_embeddings.encode
+        names = list(dict.fromkeys(name.lower() for name in names if isinstance(name, str)))
+        values, scales = encode_names(names, encode)
+        return cls.from_embeddings(names, values, scales, model_name, source_signature=source_signature,
+                                   backend=backend)
+
+    @classmethod
+    def from_embeddings(cls, names, values, scales, model_name, active=None, source_signature=None,
+                        backend=SENTENCE_BACKEND):
+        """
+        Train the lists on int8 embeddings and sort the names by list.
+        """
+        list_count = max(1, int(np.sqrt(len(names))))
+        if len(names):
+            centroids = train_centroids(values, scales, list_count)
+        else:
+            centroids = np.zeros((1, values.shape[1] if values.ndim == 2 else 0), dtype=np.float32)
+        index = cls(names, values, scales, assign_lists(values, scales, centroids), centroids, 0, model_name,
+                    active, len(names), source_signature, backend)
+        index.compact()
+        return index
+
+    def compact(self):
+        """
+        Merge the appended names into the sorted inverted lists.
+        """
+        order = np.argsort(self.lists, kind="stable")
+        self.names = [self.names[position] for position in order]
+        self.values = np.asarray(self.values)[order]
+        self.scales = np.asarray(self.scales)[order]
+        self.lists = self.lists[order]
+        self.active = self.active[order]
+        self.sorted_count = len(self.names)
+        self.positions = {name: position for position, name in enumerate(self.names)}
+        self.offsets = np.searchsorted(self.lists, np.arange(len(self.centroids) + 1))
+
+    def update(self, names, encode=None):
+        """
+        Make the index cover exactly `names`, embedding only the new ones.
+
+        Names no longer present are deactivated. Returns the number of names
+        that were embedded.
+        """
+        encode = encode or name_embeddings.encode
+        names = list(dict.fromkeys(name.lower() for name in names if isinstance(name, str)))
+        current = set(names)
+        self.active = np.array([name in current for name in self.names], dtype=bool).reshape(len(self.names))
+
+        new_names = [name for name in names if name not in self.positions]
+        if not new_names:
+            return 0
+
+        values, scales = encode_names(new_names, encode)
+        # Retrain once the index has grown well past what the lists were trained on
+        if len(self.names) + len(new_names) > 4 * max(self.trained_count, 1):
+            rebuilt = self.from_embeddings(
+                self.names + new_names,
+                np.concatenate([np.asarray(self.values), values]),
+                np.concatenate([np.asarray(self.scales), scales]),
+                self.model_name,
+                np.concatenate([self.active, np.ones(len(new_names), dtype=bool)]),
+                self.source_signature,
+                self.backend,
+            )
+            self.__dict__.update(rebuilt.__dict__)
+            return len(new_names)
+
+        for position, name in enumerate(new_names, start=len(self.names)):
+            self.positions[name] = position
+        self.names.extend(new_names)
+        self.values = np.concatenate([np.asarray(self.values), values])
+        self.scales = np.concatenate([np.asarray(self.scales), scales])
+        self.lists = np.concatenate([self.lists, assign_lists(values, scales, self.centroids)])
+        self.active = np.concatenate([self.active, np.ones(len(new_names), dtype=bool)])
+
+        if len(self.names) - self.sorted_count > MAX_UNSORTED_FRACTION * self.sorted_count:
+            self.compact()
+        return len(new_names)
+
+    def candidates(self, query_vector, nprobe=DEFAULT_NPROBE):
+        """
+        Positions of the active names in the `nprobe` lists nearest to the query.
+        """
+        nprobe = min(nprobe, len(self.centroids))
+        probe = np.argpartition(-(self.centroids @ query_vector), nprobe - 1)[:nprobe]
+
+        # Sorted names are contiguous per list, appended ones are filtered by list
+        appended = np.arange(self.sorted_count, len(self.names))
+        positions = np.concatenate(
+            [np.arange(self.offsets[i], self.offsets[i + 1]) for i in probe]
+            + [appended[np.isin(self.lists[self.sorted_count:], probe)]]
+        )
+        return positions[self.active[positions]]
+
+    @metrics.timed("semantic_dish_search")
+    def search(self, dish_name, limit=5, score_cutoff=SEMANTIC_SCORE_CUTOFF, nprobe=DEFAULT_NPROBE, encode=None):
+        """
+        Return up to `limit` (name, score) pairs scoring above `score_cutoff`.
+
+        The score blends the embedding cosine and rapidfuzz WRatio (see SEMANTIC_WEIGHT), 0-100.
+        """
+        query = default_process(dish_name)
+        if not query or not len(self):
+            return []
+
+        encode = encode or name_embeddings.encode
+        query_vector = np.asarray(encode([dish_name.lower()])[0], dtype=np.float32)
+        positions = self.candidates(query_vector, nprobe)
+        if not len(positions):
+            return []
+
+        # Per-row scales cancel out of the cosine, so the int8 values are used as they are
+        vectors = np.asarray(self.values[positions], dtype=np.float32)
+        cosines = (vectors @ query_vector) / np.maximum(np.sqrt(np.einsum('ij,ij->i', vectors, vectors)), 1e-12)
+        if len(positions) > ANN_CANDIDATES:
+            nearest = np.argpartition(-cosines, ANN_CANDIDATES - 1)[:ANN_CANDIDATES]
+            positions, cosines = positions[nearest], cosines[nearest]
+
+        matches = []
+        for position, cosine in zip(positions, cosines):
+            name = self.names[position]
+            lexical = fuzz.WRatio(query, default_process(name), processor=None)
+            score = round(SEMANTIC_WEIGHT * max(float(cosine), 0.0) * 100 + (1 - SEMANTIC_WEIGHT) * lexical)
+            if score > score_cutoff:
+                matches.append((name, score))
+        return sorted(matches, key=lambda match: -match[1])[:limit]
+
+    @classmethod
+    def load(cls, path):
+        """
+        Open an index written by save(), memory-mapping the vectors.
+        """
+        with open(os.path.join(path, "names.json"), encoding="utf-8") as file:
+            stored = json.load(file)
+        return cls(
+            stored["names"],
+            np.load(os.path.join(path, "vectors.npy"), mmap_mode="r"),
+            np.load(os.path.join(path, "scales.npy"), mmap_mode="r"),
+            np.load(os.path.join(path, "lists.npy")),
+            np.load(os.path.join(path, "centroids.npy")),
+            stored["sorted_count"],
+            stored["model_name"],
+            np.load(os.path.join(path, "active.npy")),
+            stored["trained_count"],
+            stored["source_signature"],
+            # Indexes from before the backend was recorded match no backend
+            stored.get("backend"),
+        )
+
+    def save(self, path):
+        """
+        Write the index to the `path` directory.
+        """
+        os.makedirs(path, exist_ok=True)
+        # Arrays are written to new files first: the current ones may be memory-mapped
+        arrays = {"vectors": self.values, "scales": self.scales, "lists": self.lists,
+                  "centroids": self.centroids, "active": self.active}
+        for name, array in arrays.items():
+            np.save(os.path.join(path, f"{name}.tmp.npy"), np.ascontiguousarray(array))
+
+        # The old names must not be paired with the new arrays if this stops halfway
+        names_path = os.path.join(path, "names.json")
+        if os.path.exists(names_path):
+            os.remove(names_path)
+        for name in arrays:
+            os.replace(os.path.join(path, f"{name}.tmp.npy"), os.path.join(path, f"{name}.npy"))
+
+        # Written last: an index without its names file is never loaded
+        tmp_path = os.path.join(path, "names.json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump({
+                "version": 1,
+                "model_name": self.model_name,
+                "backend": self.backend,
+                "sorted_count": self.sorted_count,
+                "trained_count": self.trained_count,
+                "source_signature": self.source_signature,
+                "names": self.names,
+            }, file)
+        os.replace(tmp_path, names_path)
+
+    @classmethod
+    def for_csv(cls, csv_path, flavor_data, index_path=None, encode=None):
+        """
+        Load the index saved next to `csv_path`, embedding only new dishes if the data changed.
+        """
+        index_path = index_path or semantic_index_path(csv_path)
+        signature = file_signature(resolve_path(csv_path))
+
+        index = None
+        if os.path.exists(os.path.join(index_path, "names.json")):
+            index = cls.load(index_path)
+            # Vectors of another model or backend cannot be mixed with new ones
+            if index.model_name != SENTENCE_MODEL_NAME or index.backend != SENTENCE_BACKEND:
+                index = None
+            elif index.source_signature == signature:
+                return index
+
+        if index is None:
+            index = cls.build(flavor_data['dish_name'].tolist(), encode, source_signature=signature,
+                              backend=SENTENCE_BACKEND)
+        else:
+            index.update(flavor_data['dish_name'].tolist(), encode)
+            index.source_signature = signature
+        index.save(index_path)
+        return index
+
+
+def load_semantic_index(csv_path, flavor_data):
+    """
+    Semantic index of a flavor database as configured by SEMANTIC_DISH_SEARCH, or None.
+    """
+    if SEMANTIC_DISH_SEARCH == "0":
+        return None
+    if SEMANTIC_DISH_SEARCH != "1" and not os.path.exists(semantic_index_path(csv_path)):
+        return None
+    return SemanticDishIndex.for_csv(csv_path, flavor_data)
+
+
+def main():
+    from columnar_store import read_table
+
+    parser = argparse.ArgumentParser(description="Build or update the semantic dish index of a flavor database.")
+    parser.add_argument("database", help="flavor database with a dish_name column")
+    parser.add_argument("--output", default=None, help="index directory (default: next to the database)")
+    args = parser.parse_args()
+
+    flavor_data = read_table(args.database, columns=['dish_name'])
+    index = SemanticDishIndex.for_csv(args.database, flavor_data, args.output)
+    print(f"Indexed {len(index)} dish names in {len(index.centroids)} lists: "
+          f"{args.output or semantic_index_path(args.database)}")
+
+
+if __name__ == "__main__":
+    main()
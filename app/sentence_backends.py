@@ -0,0 +1,169 @@
+import os
+import re
+
+import numpy as np
+
+SENTENCE_BACKENDS = ("torch", "onnx", "onnx-int8")
+
+# Expected minimum cosine similarity between a backend's embedding and the
+# PyTorch embedding of the same text. These are unverified defaults, not
+# measured guarantees: run benchmarks/bench_backends.py on the target machine,
+# which reports the measured minimum and whether it stays within them
+BACKEND_MIN_COSINE = {
+    "torch": 1.0,
+    "onnx": 0.9999,
+    "onnx-int8": 0.99,
+}
+
+# Word pieces kept per text, as in the model's sentence-transformers config
+MAX_SEQ_LENGTH = 256
+
+# Where exported (and quantized) ONNX models are kept
+ONNX_EXPORT_DIR = os.environ.get(
+    "SENTENCE_ONNX_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "onnx_models"),
+)
+
+ONNX_INPUTS = ["input_ids", "attention_mask", "token_type_ids"]
+
+
+def hub_name(model_name):
+    """
+    Hugging Face Hub id of a sentence-transformers model name.
+    """
+    return model_name if "/" in model_name else f"sentence-transformers/{model_name}"
+
+
+def export_onnx(model_name, export_dir=ONNX_EXPORT_DIR):
+    """
+    Export the transformer of `model_name` to ONNX once and return the model path.
+
+    The tokenizer is saved next to it. Batch and sequence axes are dynamic,
+    so batches are only padded to their own longest text.
+    """
+    model_dir = os.path.join(export_dir, re.sub(r"[^A-Za-z0-9_.-]", "_", model_name))
+    model_path = os.path.join(model_dir, "model.onnx")
+    if os.path.exists(model_path):
+        return model_path
+
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    tokenizer = AutoTokenizer.from_pretrained(hub_name(model_name))
+    model = AutoModel.from_pretrained(hub_name(model_name)).eval()
+    inputs = tokenizer(["an example sentence"], return_tensors="pt")
+
+    os.makedirs(model_dir, exist_ok=True)
+    tokenizer.save_pretrained(model_dir)
+    tmp_path = model_path + ".tmp"
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(inputs[name] for name in ONNX_INPUTS),
+            tmp_path,
+            input_names=ONNX_INPUTS,
+            output_names=["last_hidden_state"],
+            dynamic_axes={name: {0: "batch", 1: "sequence"} for name in ONNX_INPUTS + ["last_hidden_state"]},
+            opset_version=14,
+        )
+    os.replace(tmp_path, model_path)
+    return model_path
+
+
+def quantize_onnx(model_path):
+    """
+    Dynamically int8-quantized copy of an ONNX model (weights int8, activations quantized at run time).
+    """
+    quantized_path = model_path[:-len(".onnx")] + ".int8.onnx"
+    if not os.path.exists(quantized_path):
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        tmp_path = quantized_path + ".tmp"
+        quantize_dynamic(model_path, tmp_path, weight_type=QuantType.QInt8)
+        os.replace(tmp_path, quantized_path)
+    return quantized_path
+
+
+class OnnxEncoder:
+    """
+    Sentence encoder running an exported transformer with ONNX Runtime.
+
+    Mirrors SentenceTransformer.encode for all-MiniLM-L6-v2: mean pooling
+    over the attention mask, then L2 normalization. Texts are sorted by
+    length so that each batch is padded only to its own longest text.
+    """
+
+    def __init__(self, model_path, threads=None, max_seq_length=MAX_SEQ_LENGTH):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = [model_input.name for model_input in self.session.get_inputs()]
+        self.tokenizer = AutoTokenizer.from_pretrained(os.path.dirname(model_path))
+        self.max_seq_length = max_seq_length
+
+    def _encode_batch(self, texts):
+        tokens = self.tokenizer(
+            texts, padding="longest", truncation=True, max_length=self.max_seq_length, return_tensors="np",
+        )
+        feeds = {name: tokens[name].astype(np.int64) for name in self.input_names}
+        hidden = self.session.run(None, feeds)[0]
+
+        mask = tokens["attention_mask"][..., None].astype(np.float32)
+        return (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+
+    def encode(self, sentences, batch_size=32, convert_to_numpy=True, show_progress_bar=False, **kwargs):
+        if isinstance(sentences, str):
+            return self.encode([sentences], batch_size)[0]
+
+        order = np.argsort([-len(sentence) for sentence in sentences], kind="stable")
+        batches = [
+            self._encode_batch([sentences[i] for i in order[start:start + batch_size]])
+            for start in range(0, len(sentences), batch_size)
+        ]
+        if not batches:
+            return np.zeros((0, 0), dtype=np.float32)
+
+        embeddings = np.empty((len(sentences), batches[0].shape[1]), dtype=np.float32)
+        embeddings[order] = np.vstack(batches)
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return embeddings / norms
+
+
+def load_sentence_encoder(model_name, backend="torch", threads=None, export_dir=ONNX_EXPORT_DIR):
+    """
+    Sentence encoder for `model_name` on one of SENTENCE_BACKENDS.
+
+    "torch" is the sentence-transformers model itself; "onnx" runs it
+    exported to ONNX and "onnx-int8" its dynamically quantized copy, both
+    with ONNX Runtime. `threads` sets the intra-op thread count.
+    """
+    if backend not in SENTENCE_BACKENDS:
+        raise ValueError(f"Unknown sentence backend {backend!r}, expected one of {', '.join(SENTENCE_BACKENDS)}")
+
+    if backend == "torch":
+        import torch
+        from sentence_transformers import SentenceTransformer
+
+        if threads:
+            torch.set_num_threads(threads)
+        return SentenceTransformer(model_name)
+
+    model_path = export_onnx(model_name, export_dir)
+    if backend == "onnx-int8":
+        model_path = quantize_onnx(model_path)
+    return OnnxEncoder(model_path, threads)
+
+
+def cosine_agreement(reference, embeddings):
+    """
+    Cosine similarity of each embedding with its reference row.
+    """
+    reference = reference / np.linalg.norm(reference, axis=1, keepdims=True)
+    embeddings = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+    return np.einsum('ij,ij->i', reference, embeddings)
@@ -0,0 +1,119 @@
+import heapq
+import json
+import os
+
+import pandas as pd
+
+from columnar_store import file_signature, resolve_path
+
+
+def input_signature(input_csv_path):
+    """
+    Signature of the file the input is read from (the CSV or its Parquet copy).
+    """
+    return file_signature(resolve_path(input_csv_path))
+
+
+def load_checkpoint(checkpoint_path, input_csv_path, chunksize):
+    """
+    Return the saved checkpoint if it belongs to this input, unchanged since, and chunk size.
+    """
+    if not os.path.exists(checkpoint_path):
+        return None
+
+    with open(checkpoint_path) as file:
+        checkpoint = json.load(file)
+
+    if checkpoint.get("input") != os.path.abspath(input_csv_path) or checkpoint.get("chunksize") != chunksize:
+        return None
+    # An edited input makes the partial output stale
+    if checkpoint.get("input_signature") != input_signature(input_csv_path):
+        return None
+    return checkpoint
+
+
+def save_checkpoint(checkpoint_path, input_csv_path, chunksize, chunks_done, output_bytes):
+    """
+    Record the last completed chunk and the matching size of the output file.
+    """
+    checkpoint = {
+        "input": os.path.abspath(input_csv_path),
+        "input_signature": input_signature(input_csv_path),
+        "chunksize": chunksize,
+        "chunks_done": chunks_done,
+        "output_bytes": output_bytes,
+    }
+    tmp_path = checkpoint_path + ".tmp"
+    with open(tmp_path, "w") as file:
+        json.dump(checkpoint, file)
+    os.replace(tmp_path, checkpoint_path)
+
+
+def append_chunk(csv_path, chunk, header):
+    """
+    Append a chunk to a CSV file, flushed to disk, and return the new file size.
+    """
+    with open(csv_path, "a", newline="") as file:
+        chunk.to_csv(file, index=False, header=header)
+        file.flush()
+        os.fsync(file.fileno())
+        return file.tell()
+
+
+def truncate_file(path, size):
+    """
+    Drop anything written after `size` bytes (e.g. a chunk interrupted mid-write).
+    """
+    with open(path, "r+b") as file:
+        file.truncate(size)
+
+
+class TopKRows:
+    """
+    Keep the `k` highest-scoring distinct rows seen so far.
+
+    Uses a min-heap of size `k`, so memory stays bounded whatever the input
+    size. Ties keep the earliest row, and a repeated row is only kept once,
+    which matches drop_duplicates() followed by a stable sort and head(k).
+    """
+
+    def __init__(self, k, score_column):
+        self.k = k
+        self.score_column = score_column
+        self.columns = None
+        self._heap = []
+        self._keys = set()
+        self._seen = 0
+
+    def update(self, chunk):
+        """
+        Offer every row of a DataFrame chunk to the heap.
+        """
+        if self.columns is None:
+            self.columns = list(chunk.columns)
+
+        row_keys = pd.util.hash_pandas_object(chunk, index=False).to_numpy()
+        scores = chunk[self.score_column].to_numpy()
+        orders = range(self._seen, self._seen + len(chunk))
+        self._seen += len(chunk)
+
+        for row, key, score, order in zip(chunk.itertuples(index=False, name=None), row_keys, scores, orders):
+            if key in self._keys:
+                continue
+
+            # A later row only displaces the current minimum with a strictly higher score
+            entry = (score, -order, key, row)
+            if len(self._heap) < self.k:
+                heapq.heappush(self._heap, entry)
+                self._keys.add(key)
+            elif entry[:2] > self._heap[0][:2]:
+                evicted = heapq.heapreplace(self._heap, entry)
+                self._keys.discard(evicted[2])
+                self._keys.add(key)
+
+    def to_frame(self):
+        """
+        Rows kept so far, highest score first.
+        """
+        entries = sorted(self._heap, key=lambda entry: entry[:2], reverse=True)
+        return pd.DataFrame([entry[3] for entry in entries], columns=self.columns)
@@ -0,0 +1,158 @@
+import argparse
+import gzip
+import json
+import os
+import threading
+from functools import lru_cache
+
+from instrumentation import metrics
+from model_registry import get_wordnet
+
+# Prebuilt flavor -> synonyms index shipped next to this module
+SYNONYM_INDEX_PATH = os.environ.get(
+    "SYNONYM_INDEX_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "flavor_synonyms.json.gz"),
+)
+
+
+def get_synonyms(word):
+    """
+    Get synonyms for a word from WordNet.
+    """
+    wordnet = get_wordnet()
+    synonyms = set()
+    for syn in wordnet.synsets(word):
+        for lemma in syn.lemmas():
+            synonyms.add(lemma.name().lower())
+    return synonyms
+
+
+class SynonymIndex:
+    """
+    Flavor -> frozenset of WordNet lemmas, plus the reverse lemma -> flavors map.
+
+    Flavors missing from the index are looked up in WordNet on first use and
+    added, so an empty index behaves exactly like querying WordNet directly.
+    """
+
+    def __init__(self, synonyms=None):
+        self._synonyms = {flavor: frozenset(lemmas) for flavor, lemmas in (synonyms or {}).items()}
+        self._reverse = None
+        self._lock = threading.Lock()
+
+    def __contains__(self, flavor):
+        return flavor in self._synonyms
+
+    def __len__(self):
+        return len(self._synonyms)
+
+    def synonyms(self, flavor):
+        """
+        Synonyms of a single flavor.
+        """
+        lemmas = self._synonyms.get(flavor)
+        if lemmas is None:
+            metrics.count("wordnet.lookups")
+            with metrics.timer("wordnet.synsets"):
+                lemmas = frozenset(get_synonyms(flavor))
+            with self._lock:
+                self._synonyms[flavor] = lemmas
+                self._reverse = None
+        return lemmas
+
+    def flavors_for(self, lemma):
+        """
+        Indexed flavors that have `lemma` among their synonyms.
+        """
+        with self._lock:
+            if self._reverse is None:
+                reverse = {}
+                for flavor, lemmas in self._synonyms.items():
+                    for name in lemmas:
+                        reverse.setdefault(name, set()).add(flavor)
+                self._reverse = {name: frozenset(flavors) for name, flavors in reverse.items()}
+            return self._reverse.get(lemma, frozenset())
+
+    @classmethod
+    def build(cls, flavors):
+        """
+        Build an index for the given flavors from WordNet.
+        """
+        index = cls()
+        for flavor in flavors:
+            index.synonyms(flavor)
+        return index
+
+    @classmethod
+    def load(cls, path=SYNONYM_INDEX_PATH):
+        """
+        Load an index written by save().
+        """
+        with gzip.open(path, "rt", encoding="utf-8") as file:
+            stored = json.load(file)
+        return cls(stored["synonyms"])
+
+    def save(self, path=SYNONYM_INDEX_PATH):
+        """
+        Write the index as gzipped JSON with sorted lemma lists.
+        """
+        with self._lock:
+            synonyms = {flavor: sorted(lemmas) for flavor, lemmas in sorted(self._synonyms.items())}
+        tmp_path = path + ".tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as file:
+            json.dump({"version": 1, "synonyms": synonyms}, file, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_synonym_index():
+    """
+    Process-wide synonym index, loaded from SYNONYM_INDEX_PATH on first use.
+    """
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = SynonymIndex.load() if os.path.exists(SYNONYM_INDEX_PATH) else SynonymIndex()
+    return _index
+
+
+@lru_cache(maxsize=65536)
+def expand_flavor_tuple(flavors):
+    """
+    Flavors plus all their synonyms, memoized per tuple of flavors.
+    """
+    index = get_synonym_index()
+    expanded = set(flavors)
+    for flavor in flavors:
+        expanded.update(index.synonyms(flavor))
+    return frozenset(expanded)
+
+
+metrics.register_cache_info("flavor_synonyms", expand_flavor_tuple.cache_info)
+
+
+def main():
+    from columnar_store import read_table
+    from pdf_processor import COMMON_FLAVORS
+
+    parser = argparse.ArgumentParser(description="Build the flavor synonym index.")
+    parser.add_argument("--csv", nargs="*", default=[], help="datasets whose 'flavors' column should be indexed too")
+    parser.add_argument("--output", default=SYNONYM_INDEX_PATH)
+    args = parser.parse_args()
+
+    flavors = list(COMMON_FLAVORS)
+    for csv_path in args.csv:
+        for flavor_list in read_table(csv_path, columns=['flavors'])['flavors'].dropna().unique():
+            flavors.extend(flavor_list.split(", "))
+
+    index = SynonymIndex.build(dict.fromkeys(flavors))
+    index.save(args.output)
+    print(f"Indexed {len(index)} flavors into {args.output}")
+
+
+if __name__ == "__main__":
+    main()